@@ -0,0 +1,389 @@
+"""
+异步监控引擎
+基于 playwright.async_api 和 asyncio 的监控引擎。推文收集、新推文判断、保存状态和轮次时钟
+与同步引擎（main.py）共用同一份逻辑，但只支持逐个打开用户主页抓取：
+列表、搜索批量检查、主页变化预检、应用内切换、预加载和自适应调度只在同步引擎中可用（启动时会提示）。
+
+每轮检查由以下任务组成:
+    抓取任务: CONCURRENT_TABS 个，每个任务占用一个标签页，从用户队列中领取用户进行抓取
+    通知任务: 1 个，从通知队列中取出新推文依次发送
+发现新推文后立即进入通知队列，通知发送与后续用户的抓取同时进行。
+
+通过 ENGINE=async 启用。
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
+from . import config, database, notifier, scraper, logger, browser_config, processing, scheduler, timeline_parser, multi_timeline
+from .models import TweetList
+
+# 获取日志器
+log = logger.get_logger('async_engine')
+
+
+async def _collect_from_page_async(page: Page, collector: scraper.TweetCollector) -> int:
+    """
+    通过一次 page.evaluate 调用提取页面上的推文元素，返回本轮新增的推文数量
+
+    与同步引擎的 batch 模式使用相同的脚本和解析逻辑（scraper.add_batch_items），
+    置顶和转推标记总是会读取
+    """
+    items = await page.evaluate(scraper.EXTRACT_TWEETS_SCRIPT, scraper.get_extract_tweets_args(scraper.TWEET_SELECTOR))
+    log.debug(f"用户 {collector.username}: 页面上找到 {len(items)} 个推文元素")
+    return scraper.add_batch_items(items, collector)
+
+
+async def _collect_from_responses_async(responses: List, collector: scraper.TweetCollector) -> int:
+    """解析已捕获的时间线接口响应，返回本轮新增的推文数量"""
+    new_tweets_in_this_batch = 0
+    while responses:
+        response = responses.pop(0)
+        try:
+            payload = await response.json()
+        except Exception as e:
+            log.warning(f"用户 {collector.username}: 读取时间线接口响应失败: {e}")
+            continue
+        new_tweets_in_this_batch += scraper.add_timeline_payload(payload, collector)
+    return new_tweets_in_this_batch
+
+
+async def _wait_until_ready_async(page: Page, captured_responses: List, timeout_ms: int = 30000) -> Optional[str]:
+    """TimelineScrape.wait_until_ready 的异步版本"""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        state = await page.evaluate(scraper.DETECT_PAGE_STATE_SCRIPT, scraper.get_page_state_args())
+        if state is None and captured_responses:
+            state = scraper.PAGE_STATE_TWEETS
+        if state or time.monotonic() >= deadline:
+            return state
+        await asyncio.sleep(0.1)
+
+
+async def _wait_for_responses_async(page: Page, captured_responses: List, timeout_ms: int = 30000):
+    """TimelineScrape.wait_for_tweets 在 graphql 模式下的异步版本：等待时间线接口响应，不依赖页面结构"""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while not captured_responses:
+        if time.monotonic() >= deadline:
+            raise PlaywrightTimeoutError(f"等待时间线接口响应超时 ({timeout_ms} 毫秒)")
+        await asyncio.sleep(0.1)
+
+
+async def scrape_user_tweets_async(page: Page, username: str, since_id: Optional[str] = None,
+                                   deadline: Optional[float] = None) -> TweetList:
+    """
+    scraper.scrape_user_tweets 的异步版本，停止条件和返回格式相同
+
+    推文收集、日期范围、已见推文判断和结果整理都使用 scraper 中的同一份逻辑；
+    dom、batch 和 stream 模式都通过一次 page.evaluate 批量提取页面元素，graphql 模式解析时间线接口响应
+    """
+    url = f"https://x.com/{username}"
+    log.info(f"访问用户页面: {url}")
+    collector = scraper.TweetCollector(username, since_id)
+    use_graphql = config.SCRAPE_MODE == "graphql"
+    wait_for_ready = config.NAVIGATION_MODE == "ready"
+    captured_responses = []
+    scroll_attempts = 0
+    scroll_wait_ms = 0
+
+    def on_response(response):
+        if timeline_parser.is_timeline_response(response.url):
+            captured_responses.append(response)
+
+    if use_graphql:
+        page.on("response", on_response)
+
+    try:
+        try:
+            navigation_start = time.perf_counter()
+            await page.goto(url, wait_until="domcontentloaded" if wait_for_ready else "networkidle",
+                            timeout=scraper.get_timeout_ms(deadline, 60000))
+            log.debug(f"成功访问页面: {url}")
+        except PlaywrightTimeoutError:
+            log.warning(f"访问 {url} 超时，但仍尝试继续处理")
+        except Exception as e:
+            log.error(f"访问 {url} 时发生严重错误: {e}")
+            return []
+
+        state = None
+        if wait_for_ready:
+            state = await _wait_until_ready_async(page, captured_responses, scraper.get_timeout_ms(deadline, 30000))
+            if state is None:
+                log.warning(f"用户 {username}: 等待推文出现超时，但仍尝试继续处理")
+        scraper.record_navigation('full', time.perf_counter() - navigation_start, username)
+        if not scraper.check_page_state(username, state):
+            return []
+
+        try:
+            if use_graphql:
+                await _wait_for_responses_async(page, captured_responses, scraper.get_timeout_ms(deadline, 30000))
+            else:
+                await page.wait_for_selector(scraper.TWEET_SELECTOR, timeout=scraper.get_timeout_ms(deadline, 30000))
+
+            while scroll_attempts < scraper.MAX_SCROLL_ATTEMPTS:
+                if use_graphql:
+                    new_tweets_in_this_batch = await _collect_from_responses_async(captured_responses, collector)
+                else:
+                    new_tweets_in_this_batch = await _collect_from_page_async(page, collector)
+                log.debug(f"用户 {username}: 本轮找到 {new_tweets_in_this_batch} 条新推文，总计 {len(collector.tweets)} 条")
+
+                stop_reason = collector.get_stop_reason(new_tweets_in_this_batch)
+                if stop_reason:
+                    log.info(f"用户 {username}: {stop_reason}，停止加载更多内容")
+                    break
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    log.warning(f"用户 {username}: 已用完本次抓取的时间预算，停止加载更多内容")
+                    break
+
+                wait_args = scraper.get_scroll_wait_args(scraper.TWEET_SELECTOR)
+                wait_result = await page.evaluate(scraper.SCROLL_AND_WAIT_SCRIPT, wait_args)
+                scraper.record_scroll_wait(wait_result, wait_args['timeoutMs'])
+                scroll_wait_ms += wait_result['elapsed']
+                scroll_attempts += 1
+
+        except PlaywrightTimeoutError:
+            log.warning(f"在用户 {username} 页面上等待推文超时，页面可能未加载或没有推文")
+        except Exception as e:
+            log.error(f"在抓取用户 {username} 页面时发生错误: {e}")
+            await page.screenshot(path=f"error_screenshot_{username}.png")
+            log.info(f"已保存错误截图: error_screenshot_{username}.png")
+    finally:
+        if use_graphql:
+            page.remove_listener("response", on_response)
+
+    return scraper.finish_scrape(collector, scroll_attempts, scroll_wait_ms)
+
+
+class AsyncBrowser:
+    """异步引擎使用的浏览器：跨轮次复用，每轮开始前检查健康状态"""
+
+    def __init__(self, page_count: int):
+        self.page_count = page_count
+        self.playwright = None
+        self.context = None
+        self.pages = []
+        self.resource_blocker = None
+        self.rounds_since_launch = 0
+
+    async def start(self):
+        headless_mode, slow_mo = browser_config.get_main_browser_config()
+        log.info(f"浏览器模式: {'无头模式' if headless_mode else '可视模式'}，标签页: {self.page_count} 个")
+        try:
+            self.playwright = await async_playwright().start()
+            self.context = await browser_config.create_browser_context_async(self.playwright, headless_mode, slow_mo)
+            if config.BLOCK_RESOURCES:
+                self.resource_blocker = await browser_config.install_resource_blocking_async(self.context)
+            self.pages = [await browser_config.create_configured_page_async(self.context)
+                          for _ in range(self.page_count)]
+        except Exception:
+            await self.stop()
+            raise
+        self.rounds_since_launch = 0
+
+    async def stop(self):
+        if self.context:
+            try:
+                await self.context.close()
+            except Exception as e:
+                log.debug(f"关闭浏览器上下文时出错: {e}")
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                log.debug(f"停止 Playwright 时出错: {e}")
+        self.playwright = None
+        self.context = None
+        self.pages = []
+        self.resource_blocker = None
+
+    async def _is_healthy(self) -> bool:
+        try:
+            await asyncio.gather(*(page.evaluate("1") for page in self.pages))
+            return True
+        except Exception as e:
+            log.warning(f"浏览器健康检查失败: {e}")
+            return False
+
+    async def ensure_ready(self) -> List[Page]:
+        """按需启动或重启浏览器，返回可用的标签页列表"""
+        if not self.context:
+            await self.start()
+        elif not await self._is_healthy():
+            await self.stop()
+            await self.start()
+        elif config.BROWSER_RECYCLE_ROUNDS and self.rounds_since_launch >= config.BROWSER_RECYCLE_ROUNDS:
+            log.info(f"浏览器已连续运行 {self.rounds_since_launch} 轮，重启")
+            await self.stop()
+            await self.start()
+        self.rounds_since_launch += 1
+        return self.pages
+
+    def end_round(self):
+        if self.resource_blocker:
+            self.resource_blocker.log_summary()
+            self.resource_blocker.reset()
+
+
+class AsyncMonitor:
+    """异步监控引擎"""
+
+    def __init__(self):
+        self.browser = AsyncBrowser(config.CONCURRENT_TABS)
+
+    async def _scrape_worker(self, page: Page, user_queue: asyncio.Queue, notify_queue: asyncio.Queue,
+                             since_ids: Dict[str, str], round_state: Dict, deadline: Optional[float] = None):
+        """抓取任务：从队列中领取用户抓取，新推文放入通知队列；到达截止时间后不再领取新用户"""
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            try:
+                user = user_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            user_deadline = None
+            if deadline is not None:
+                # 剩余时间按标签页数量平均分给尚未检查的用户（与 TabPool 相同）
+                now = time.monotonic()
+                remaining_users = user_queue.qsize() + 1
+                share = (deadline - now) * self.browser.page_count / max(remaining_users, self.browser.page_count)
+                user_deadline = min(deadline, now + max(share, 0))
+
+            logger.log_scraping_start(user, config.DAYS_TO_SCRAPE, config.MAX_TWEETS_PER_USER)
+            round_state['checked_users'].add(user)
+            try:
+                found_tweets = await asyncio.wait_for(
+                    scrape_user_tweets_async(page, user, since_ids.get(user), user_deadline),
+                    timeout=config.USER_SCRAPE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                log.warning(f"抓取用户 {user} 超过 {config.USER_SCRAPE_TIMEOUT_SECONDS} 秒，本轮跳过")
+                found_tweets = []
+            except Exception as e:
+                log.error(f"抓取用户 {user} 时发生错误: {e}", exc_info=True)
+                found_tweets = []
+
+            new_tweets = processing.check_user_tweets(
+                user, found_tweets, round_state['seen_store'], round_state['seen_marks'])
+            round_state['new_tweets_count'] += len(new_tweets)
+            for tweet in new_tweets:
+                notify_queue.put_nowait(tweet)
+
+    async def _notify_worker(self, notify_queue: asyncio.Queue):
+        """通知任务：依次发送通知队列中的新推文，收到 None 时结束"""
+        while True:
+            tweet = await notify_queue.get()
+            if tweet is None:
+                return
+            log.info(f"发送新推文通知: 用户: {tweet.user}, ID: {tweet.id}, 时间: {tweet.timestamp}")
+            success = await notifier.send_telegram_notification_async(
+                notifier.format_tweet_message(tweet), tweet.user)
+            logger.log_notification_sent(tweet.user, tweet.id_str, success)
+            await asyncio.sleep(1) # 短暂延迟，避免触发Telegram的速率限制
+
+    async def run_round(self, users: Optional[List[str]] = None,
+                        deadline: Optional[float] = None) -> Tuple[int, List[str]]:
+        """
+        执行一轮监控检查
+
+        Args:
+            users: 本轮要检查的用户，默认检查所有配置的用户
+            deadline: 本轮的截止时间（time.monotonic() 时间），到期后剩余的用户不再检查
+
+        Returns:
+            tuple: (新推文数量, 本轮未检查的用户列表)
+        """
+        logger.log_round_start()
+
+        # 检查浏览器配置文件是否存在
+        if not os.path.exists(browser_config.USER_DATA_DIR):
+            log.error(f"浏览器配置文件目录 '{browser_config.USER_DATA_DIR}' 未找到")
+            log.error("请先运行 'python initialize_profile.py' 来完成首次登录和初始化")
+            return 0, list(users if users is not None else get_users())
+
+        # 确认可以开始本轮之后再打开存储，本轮结束时由 save_round_state 关闭
+        round_state = {
+            'seen_store': database.open_seen_store(),
+            'seen_marks': database.open_seen_marks(),
+            'new_tweets_count': 0,
+            'checked_users': set(),
+        }
+
+        if users is None:
+            users = get_users()
+        since_ids = round_state['seen_marks'].get_since_ids(users) if config.STOP_AT_LAST_SEEN else {}
+
+        user_queue = asyncio.Queue()
+        for user in users:
+            user_queue.put_nowait(user)
+        notify_queue = asyncio.Queue()
+        notify_task = asyncio.ensure_future(self._notify_worker(notify_queue))
+
+        try:
+            pages = await self.browser.ensure_ready()
+            await asyncio.gather(*(
+                self._scrape_worker(page, user_queue, notify_queue, since_ids, round_state, deadline)
+                for page in pages
+            ))
+        except Exception as e:
+            log.error(f"Playwright 执行过程中发生未知错误: {e}", exc_info=True)
+        finally:
+            scraper.log_navigation_summary()
+            self.browser.end_round()
+            # 等待已发现的新推文全部发送完成
+            notify_queue.put_nowait(None)
+            await notify_task
+
+        processing.save_round_state(round_state['seen_store'], round_state['seen_marks'],
+                                    round_state['new_tweets_count'])
+
+        unchecked_users = [user for user in users if user not in round_state['checked_users']]
+        if unchecked_users:
+            log.warning(f"本轮时间预算已用完，{len(unchecked_users)} 个用户顺延到下一轮")
+        return round_state['new_tweets_count'], unchecked_users
+
+    async def run(self):
+        """在固定的时间点循环检查所有用户，上一轮未检查的用户在下一轮优先检查（与同步引擎相同）"""
+        users = get_users()
+        clock = scheduler.RoundClock(config.MONITOR_INTERVAL_SECONDS)
+        rolled_over = []
+        try:
+            while True:
+                deadline = await clock.wait_for_next_tick_async()
+                round_users = rolled_over + [user for user in users if user not in rolled_over]
+                new_tweets_count, rolled_over = await self.run_round(round_users, deadline)
+                clock.end_round(len(rolled_over))
+                logger.log_round_end(new_tweets_count, int(clock.seconds_until_next_tick()))
+        finally:
+            await self.browser.stop()
+
+
+def get_users() -> List[str]:
+    """返回异步引擎监控的用户（只支持逐个打开主页，列表来源不在其中）"""
+    return [user.strip() for user in config.TARGET_USERS if user.strip()]
+
+
+def log_unsupported_options():
+    """提示异步引擎不支持、会被忽略的配置"""
+    unsupported = []
+    if multi_timeline.get_list_sources():
+        unsupported.append("TARGET_LISTS")
+    if multi_timeline.get_search_batch_users(get_users()):
+        unsupported.append("SEARCH_BATCH_USERS")
+    if config.CHANGE_PROBE:
+        unsupported.append("CHANGE_PROBE")
+    if config.SPA_NAVIGATION:
+        unsupported.append("SPA_NAVIGATION")
+    if config.PREFETCH_DEPTH > 0:
+        unsupported.append("PREFETCH_DEPTH")
+    if config.ADAPTIVE_SCHEDULING:
+        unsupported.append("ADAPTIVE_SCHEDULING")
+    if unsupported:
+        log.warning(f"异步引擎不支持以下配置，将被忽略: {', '.join(unsupported)}")
+
+
+def run():
+    """启动异步监控引擎（阻塞直到被中断）"""
+    log_unsupported_options()
+    asyncio.run(AsyncMonitor().run())
@@ -4,13 +4,43 @@
 确保登录状态能够正确共享
 """
 import os
+from collections import defaultdict
 from playwright_stealth.stealth import Stealth
-from . import config
+from . import config, logger
+
+# 获取日志器
+log = logger.get_logger('browser')
 
 # 浏览器配置常量
 USER_DATA_DIR = "./browser_profile"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
 
+# 统一的反检测JavaScript
+ANTI_DETECTION_SCRIPT = """
+        // 移除webdriver属性
+        Object.defineProperty(navigator, 'webdriver', {
+            get: () => undefined,
+        });
+        
+        // 伪造chrome对象
+        window.chrome = {
+            runtime: {},
+            loadTimes: function() {},
+            csi: function() {},
+            app: {}
+        };
+        
+        // 伪造插件信息
+        Object.defineProperty(navigator, 'plugins', {
+            get: () => [1, 2, 3, 4, 5],
+        });
+        
+        // 伪造语言信息
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['zh-CN', 'zh', 'en'],
+        });
+"""
+
 def get_browser_args():
     """获取统一的浏览器启动参数"""
     return [
@@ -34,19 +64,20 @@ def get_browser_args():
         '--use-mock-keychain'
     ]
 
-def get_browser_context_options(headless=False, slow_mo=0):
+def get_browser_context_options(headless=False, slow_mo=0, user_data_dir=None):
     """
     获取统一的浏览器上下文选项
     
     Args:
         headless: 是否使用无头模式
         slow_mo: 慢动作延迟（毫秒）
+        user_data_dir: 浏览器配置文件目录，默认使用 USER_DATA_DIR
     
     Returns:
         dict: 浏览器上下文选项
     """
     return {
-        'user_data_dir': USER_DATA_DIR,
+        'user_data_dir': user_data_dir or USER_DATA_DIR,
         'headless': headless,
         'user_agent': USER_AGENT,
         'viewport': {'width': 1920, 'height': 1080},
@@ -72,32 +103,9 @@ def apply_stealth_and_scripts(page):
     stealth.apply_stealth_sync(page)
     
     # 添加统一的反检测JavaScript
-    page.add_init_script("""
-        // 移除webdriver属性
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => undefined,
-        });
-        
-        // 伪造chrome对象
-        window.chrome = {
-            runtime: {},
-            loadTimes: function() {},
-            csi: function() {},
-            app: {}
-        };
-        
-        // 伪造插件信息
-        Object.defineProperty(navigator, 'plugins', {
-            get: () => [1, 2, 3, 4, 5],
-        });
-        
-        // 伪造语言信息
-        Object.defineProperty(navigator, 'languages', {
-            get: () => ['zh-CN', 'zh', 'en'],
-        });
-    """)
+    page.add_init_script(ANTI_DETECTION_SCRIPT)
 
-def create_browser_context(playwright_instance, headless=False, slow_mo=0):
+def create_browser_context(playwright_instance, headless=False, slow_mo=0, user_data_dir=None):
     """
     创建统一配置的浏览器上下文
     
@@ -105,11 +113,12 @@ def create_browser_context(playwright_instance, headless=False, slow_mo=0):
         playwright_instance: Playwright实例
         headless: 是否使用无头模式
         slow_mo: 慢动作延迟（毫秒）
+        user_data_dir: 浏览器配置文件目录，默认使用 USER_DATA_DIR
     
     Returns:
         BrowserContext: 配置好的浏览器上下文
     """
-    options = get_browser_context_options(headless, slow_mo)
+    options = get_browser_context_options(headless, slow_mo, user_data_dir)
     return playwright_instance.chromium.launch_persistent_context(**options)
 
 def create_configured_page(context):
@@ -126,6 +135,174 @@ def create_configured_page(context):
     apply_stealth_and_scripts(page)
     return page
 
+async def apply_stealth_and_scripts_async(page):
+    """apply_stealth_and_scripts 的异步版本，用于 playwright.async_api 的页面"""
+    stealth = Stealth()
+    await stealth.apply_stealth_async(page)
+    await page.add_init_script(ANTI_DETECTION_SCRIPT)
+
+async def create_browser_context_async(playwright_instance, headless=False, slow_mo=0, user_data_dir=None):
+    """create_browser_context 的异步版本，使用相同的启动参数"""
+    options = get_browser_context_options(headless, slow_mo, user_data_dir)
+    return await playwright_instance.chromium.launch_persistent_context(**options)
+
+async def create_configured_page_async(context):
+    """create_configured_page 的异步版本"""
+    page = await context.new_page()
+    await apply_stealth_and_scripts_async(page)
+    return page
+
+class ResourceBlocker:
+    """
+    请求拦截器
+    在浏览器上下文的每个页面上拦截监控不需要的资源（图片、视频、字体、统计请求等），
+    并按资源类型统计拦截的请求数和节省的流量
+
+    通过 CDP 的 Network.setBlockedURLs 由浏览器直接拦截，不使用 context.route:
+    context.route 会关闭浏览器的 HTTP 缓存（长期运行的浏览器每次打开主页都要重新下载 X 的脚本），
+    并且每个请求都要等待 Python 端处理，同步代码不在 Playwright 调用中时（如处理抓取结果期间）请求会被阻塞
+    """
+
+    # 按资源类型拦截时使用的URL规则（Network.setBlockedURLs 只能按URL匹配，* 为通配符）
+    RESOURCE_TYPE_URL_PATTERNS = {
+        'image': ['*://pbs.twimg.com/*', '*://abs.twimg.com/emoji/*', '*://abs.twimg.com/sticky/*'],
+        'media': ['*://video.twimg.com/*'],
+        'font': ['*.woff*', '*.ttf*', '*.otf*'],
+    }
+
+    # 无法得知被拦截请求的真实大小时使用的各类型典型大小（字节）
+    TYPICAL_RESOURCE_SIZES = {
+        'image': 40 * 1024,
+        'media': 500 * 1024,
+        'font': 40 * 1024,
+        'script': 30 * 1024,
+    }
+    DEFAULT_RESOURCE_SIZE = 2 * 1024
+
+    def __init__(self, blocked_types, blocked_url_patterns):
+        self.blocked_types = set(blocked_types)
+        self.blocked_url_patterns = list(blocked_url_patterns)
+        unsupported_types = self.blocked_types - set(self.RESOURCE_TYPE_URL_PATTERNS)
+        if unsupported_types:
+            log.warning(f"资源类型 {sorted(unsupported_types)} 没有对应的URL规则，不会被拦截")
+        self.reset()
+
+    def reset(self):
+        """清空统计数据（每轮监控开始时调用）"""
+        self.blocked_requests = defaultdict(int)
+        self.loaded_requests = defaultdict(int)
+        self.loaded_bytes = defaultdict(int)
+
+    def get_url_patterns(self) -> list:
+        """生成 Network.setBlockedURLs 使用的URL规则"""
+        patterns = []
+        for resource_type in sorted(self.blocked_types):
+            patterns.extend(self.RESOURCE_TYPE_URL_PATTERNS.get(resource_type, []))
+        patterns.extend(f"*{pattern}*" for pattern in self.blocked_url_patterns)
+        return patterns
+
+    def handle_loading_failed(self, params: dict):
+        """CDP Network.loadingFailed 事件的回调：统计被拦截的请求（只用于统计，不影响请求本身）"""
+        if params.get('blockedReason') == 'inspector':
+            self.blocked_requests[params.get('type', 'Other').lower()] += 1
+
+    def attach(self, context, page):
+        """在页面上启用拦截"""
+        try:
+            session = context.new_cdp_session(page)
+            session.on("Network.loadingFailed", self.handle_loading_failed)
+            session.send("Network.enable")
+            session.send("Network.setBlockedURLs", {"urls": self.get_url_patterns()})
+        except Exception as e:
+            log.warning(f"在页面上启用资源拦截失败: {e}")
+
+    async def attach_async(self, context, page):
+        """attach 的异步版本，用于 playwright.async_api 的上下文"""
+        try:
+            session = await context.new_cdp_session(page)
+            session.on("Network.loadingFailed", self.handle_loading_failed)
+            await session.send("Network.enable")
+            await session.send("Network.setBlockedURLs", {"urls": self.get_url_patterns()})
+        except Exception as e:
+            log.warning(f"在页面上启用资源拦截失败: {e}")
+
+    def handle_response(self, response):
+        """记录放行请求的响应大小（来自 Content-Length，用于估算被拦截请求的大小）"""
+        resource_type = response.request.resource_type
+        self.loaded_requests[resource_type] += 1
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit():
+            self.loaded_bytes[resource_type] += int(content_length)
+
+    def estimate_resource_size(self, resource_type: str) -> int:
+        """估算某类资源的单个请求大小：优先使用本轮实际加载的平均大小"""
+        if self.loaded_requests[resource_type] and self.loaded_bytes[resource_type]:
+            return self.loaded_bytes[resource_type] // self.loaded_requests[resource_type]
+        return self.TYPICAL_RESOURCE_SIZES.get(resource_type, self.DEFAULT_RESOURCE_SIZE)
+
+    def get_stats(self) -> dict:
+        """
+        获取统计数据
+
+        Returns:
+            dict: {资源类型: {'blocked': 拦截请求数, 'saved_bytes': 预估节省字节数}}
+        """
+        return {
+            resource_type: {
+                'blocked': count,
+                'saved_bytes': count * self.estimate_resource_size(resource_type),
+            }
+            for resource_type, count in self.blocked_requests.items()
+        }
+
+    def log_summary(self):
+        """输出本轮的拦截统计"""
+        stats = self.get_stats()
+        total_blocked = sum(item['blocked'] for item in stats.values())
+        total_saved = sum(item['saved_bytes'] for item in stats.values())
+        total_loaded = sum(self.loaded_bytes.values())
+        log.info(f"资源拦截: 共拦截 {total_blocked} 个请求，预估节省 {total_saved / 1024:.1f} KB，"
+                 f"实际加载 {sum(self.loaded_requests.values())} 个请求 ({total_loaded / 1024:.1f} KB)")
+        for resource_type, item in sorted(stats.items(), key=lambda x: -x[1]['saved_bytes']):
+            log.info(f"  {resource_type}: 拦截 {item['blocked']} 个请求，预估节省 {item['saved_bytes'] / 1024:.1f} KB")
+
+
+def install_resource_blocking(context, blocked_types=None, blocked_url_patterns=None):
+    """
+    在浏览器上下文的现有页面和之后创建的页面上安装请求拦截
+
+    Args:
+        context: 浏览器上下文
+        blocked_types: 要拦截的资源类型，默认使用 config.BLOCKED_RESOURCE_TYPES
+        blocked_url_patterns: 要拦截的URL片段，默认使用 config.BLOCKED_URL_PATTERNS
+
+    Returns:
+        ResourceBlocker: 拦截器，可用于读取统计数据
+    """
+    blocker = ResourceBlocker(
+        blocked_types if blocked_types is not None else config.BLOCKED_RESOURCE_TYPES,
+        blocked_url_patterns if blocked_url_patterns is not None else config.BLOCKED_URL_PATTERNS,
+    )
+    for page in context.pages:
+        blocker.attach(context, page)
+    context.on("page", lambda page: blocker.attach(context, page))
+    context.on("response", blocker.handle_response)
+    log.info(f"已启用资源拦截: 类型 {sorted(blocker.blocked_types)}, URL规则 {len(blocker.blocked_url_patterns)} 条")
+    return blocker
+
+async def install_resource_blocking_async(context, blocked_types=None, blocked_url_patterns=None):
+    """install_resource_blocking 的异步版本"""
+    blocker = ResourceBlocker(
+        blocked_types if blocked_types is not None else config.BLOCKED_RESOURCE_TYPES,
+        blocked_url_patterns if blocked_url_patterns is not None else config.BLOCKED_URL_PATTERNS,
+    )
+    for page in context.pages:
+        await blocker.attach_async(context, page)
+    context.on("page", lambda page: blocker.attach_async(context, page))
+    context.on("response", blocker.handle_response)
+    log.info(f"已启用资源拦截: 类型 {sorted(blocker.blocked_types)}, URL规则 {len(blocker.blocked_url_patterns)} 条")
+    return blocker
+
 def get_main_browser_config():
     """
     获取main.py使用的浏览器配置
@@ -164,6 +341,13 @@ __all__ = [
     'apply_stealth_and_scripts',
     'create_browser_context',
     'create_configured_page',
+    'ResourceBlocker',
+    'install_resource_blocking',
+    'ANTI_DETECTION_SCRIPT',
+    'apply_stealth_and_scripts_async',
+    'create_browser_context_async',
+    'create_configured_page_async',
+    'install_resource_blocking_async',
     'get_main_browser_config',
     'get_init_browser_config'
 ]
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+浏览器生命周期管理模块
+在多轮监控之间复用同一个浏览器上下文，避免每轮重复启动 Chromium 和应用反检测配置；
+每轮开始前进行健康检查，在浏览器崩溃、断开连接、达到轮数上限或内存占用过高时自动重启
+"""
+import os
+import time
+from typing import Optional
+from playwright.sync_api import sync_playwright
+from . import config, logger, browser_config
+
+# 获取日志器
+log = logger.get_logger('browser')
+
+
+def get_process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """
+    统计指定进程的所有子孙进程（Playwright 驱动和 Chromium 进程）占用的物理内存
+
+    通过 /proc 读取，仅支持 Linux；其他平台返回 None
+
+    Returns:
+        float: 内存占用（MB）
+    """
+    if not os.path.isdir('/proc'):
+        return None
+
+    children = {}
+    rss_kb = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status', 'r', encoding='utf-8') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue  # 进程已退出
+        pid = int(entry)
+        children.setdefault(int(fields.get('PPid', '0').strip()), []).append(pid)
+        rss_kb[pid] = int(fields.get('VmRSS', '0 kB').split()[0])
+
+    total_kb = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        total_kb += rss_kb.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+class BrowserManager:
+    """
+    长期运行的浏览器管理器
+
+    用法:
+        manager = BrowserManager()
+        page = manager.ensure_ready()  # 每轮开始时调用
+        ...
+        manager.end_round()            # 每轮结束时调用
+        manager.stop()                 # 程序退出时调用
+    """
+
+    def __init__(self, user_data_dir: Optional[str] = None,
+                 max_rounds: Optional[int] = None, max_rss_mb: Optional[int] = None):
+        """
+        Args:
+            user_data_dir: 浏览器配置文件目录，默认使用 browser_config.USER_DATA_DIR
+            max_rounds: 浏览器运行多少轮后重启，0 表示不限制
+            max_rss_mb: 浏览器内存占用超过多少 MB 后重启，0 表示不限制
+        """
+        self.user_data_dir = user_data_dir or browser_config.USER_DATA_DIR
+        self.max_rounds = config.BROWSER_RECYCLE_ROUNDS if max_rounds is None else max_rounds
+        self.max_rss_mb = config.BROWSER_RECYCLE_RSS_MB if max_rss_mb is None else max_rss_mb
+
+        self.playwright = None
+        self.context = None
+        self.page = None
+        self.resource_blocker = None
+
+        self.rounds_since_launch = 0
+        self.launch_count = 0
+        self.last_startup_seconds = 0.0
+        self.saved_startup_seconds = 0.0
+        self._disconnected = False
+
+    @property
+    def is_running(self) -> bool:
+        return self.context is not None
+
+    def start(self):
+        """启动浏览器并创建配置好的页面"""
+        start_time = time.perf_counter()
+
+        # === 使用统一的浏览器配置，确保与initialize_profile.py完全一致 ===
+        headless_mode, slow_mo = browser_config.get_main_browser_config()
+
+        # 记录浏览器模式
+        if config.ENABLE_VISUAL_SCRAPING:
+            log.info("启用可视化抓取模式 - 浏览器窗口将可见")
+            log.info(f"可视化延迟: {slow_mo} 毫秒")
+        else:
+            log.info(f"浏览器模式: {'无头模式' if headless_mode else '可视模式'}")
+
+        try:
+            self.playwright = sync_playwright().start()
+            self.context = browser_config.create_browser_context(
+                self.playwright, headless_mode, slow_mo, user_data_dir=self.user_data_dir)
+            self.context.on("close", self._on_disconnected)
+            if config.BLOCK_RESOURCES:
+                self.resource_blocker = browser_config.install_resource_blocking(self.context)
+            self.page = self._new_page()
+        except Exception:
+            # 启动失败时清理已创建的部分，下一轮重新启动
+            self.stop()
+            raise
+
+        self._disconnected = False
+        self.rounds_since_launch = 0
+        self.launch_count += 1
+        self.last_startup_seconds = time.perf_counter() - start_time
+        log.info(f"浏览器已启动 (第 {self.launch_count} 次)，启动耗时 {self.last_startup_seconds:.2f} 秒")
+
+    def stop(self):
+        """关闭浏览器，忽略关闭过程中的错误（浏览器可能已经崩溃）"""
+        if self.context:
+            try:
+                self.context.close()
+            except Exception as e:
+                log.debug(f"关闭浏览器上下文时出错: {e}")
+        if self.playwright:
+            try:
+                self.playwright.stop()
+            except Exception as e:
+                log.debug(f"停止 Playwright 时出错: {e}")
+        self.context = None
+        self.page = None
+        self.playwright = None
+        self.resource_blocker = None
+
+    def restart(self, reason: str):
+        """重启浏览器"""
+        log.warning(f"重启浏览器: {reason}")
+        self.stop()
+        self.start()
+
+    def _new_page(self):
+        page = browser_config.create_configured_page(self.context)
+        page.on("crash", self._on_page_crash)
+        return page
+
+    def _on_disconnected(self, *args):
+        self._disconnected = True
+
+    def _on_page_crash(self, *args):
+        log.warning("页面崩溃，将在下次健康检查时重建")
+
+    def check_health(self) -> Optional[str]:
+        """
+        检查浏览器是否可用
+
+        Returns:
+            str: 不可用的原因，可用时返回 None
+        """
+        if self._disconnected:
+            return "浏览器已断开连接"
+        if self.page is None or self.page.is_closed():
+            try:
+                self.page = self._new_page()
+            except Exception as e:
+                return f"无法创建新页面: {e}"
+        try:
+            self.page.evaluate("1")
+        except Exception as e:
+            # 页面崩溃后无法再执行脚本，先尝试换一个新页面
+            try:
+                self.page.close()
+                self.page = self._new_page()
+                self.page.evaluate("1")
+            except Exception:
+                return f"页面无响应: {e}"
+        return None
+
+    def _get_recycle_reason(self) -> Optional[str]:
+        """判断是否需要主动重启浏览器以释放资源"""
+        if self.max_rounds and self.rounds_since_launch >= self.max_rounds:
+            return f"已连续运行 {self.rounds_since_launch} 轮"
+        if self.max_rss_mb:
+            rss_mb = get_process_tree_rss_mb(os.getpid())
+            if rss_mb is not None:
+                log.debug(f"浏览器内存占用: {rss_mb:.0f} MB")
+                if rss_mb >= self.max_rss_mb:
+                    return f"内存占用 {rss_mb:.0f} MB 超过上限 {self.max_rss_mb} MB"
+        return None
+
+    def ensure_ready(self):
+        """
+        在每轮开始前调用：按需启动、重启浏览器，返回可用的页面
+
+        Returns:
+            Page: 配置好的页面对象
+        """
+        if not self.is_running:
+            self.start()
+        else:
+            reason = self.check_health() or self._get_recycle_reason()
+            if reason:
+                self.restart(reason)
+            else:
+                self.saved_startup_seconds += self.last_startup_seconds
+                log.info(f"复用已启动的浏览器 (已运行 {self.rounds_since_launch} 轮)，"
+                         f"累计节省启动时间 {self.saved_startup_seconds:.1f} 秒")
+
+        self.rounds_since_launch += 1
+        return self.page
+
+    def end_round(self):
+        """在每轮结束时调用：输出并重置本轮的资源拦截统计"""
+        if self.resource_blocker:
+            self.resource_blocker.log_summary()
+            self.resource_blocker.reset()
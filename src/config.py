@@ -6,6 +6,7 @@ load_dotenv()
 
 # Monitor Configuration
 TARGET_USERS = os.getenv("TARGET_USERS", "").split(',')
+TARGET_LISTS = os.getenv("TARGET_LISTS", "").split(',')  # 要监控的 X 列表ID（列表地址 x.com/i/lists/<ID> 中的数字），每个列表每轮只加载一次
 MONITOR_INTERVAL_SECONDS = int(os.getenv("MONITOR_INTERVAL_SECONDS", 600))
 HEADLESS_MODE = os.getenv("HEADLESS_MODE", "true").lower() == "true"
 
@@ -13,12 +14,76 @@ HEADLESS_MODE = os.getenv("HEADLESS_MODE", "true").lower() == "true"
 ENABLE_VISUAL_SCRAPING = os.getenv("ENABLE_VISUAL_SCRAPING", "false").lower() == "true"  # 是否启用可视化抓取
 VISUAL_SCRAPING_SLOW_MO = int(os.getenv("VISUAL_SCRAPING_SLOW_MO", 1000))  # 可视化模式下的操作延迟（毫秒）
 
+# Browser Lifecycle Configuration
+KEEP_BROWSER_ALIVE = os.getenv("KEEP_BROWSER_ALIVE", "true").lower() == "true"  # 是否在多轮监控之间复用同一个浏览器
+BROWSER_RECYCLE_ROUNDS = int(os.getenv("BROWSER_RECYCLE_ROUNDS", 50))  # 浏览器运行多少轮后重启（0 表示不限制）
+BROWSER_RECYCLE_RSS_MB = int(os.getenv("BROWSER_RECYCLE_RSS_MB", 2048))  # 浏览器内存占用超过多少 MB 后重启（0 表示不限制，仅 Linux 有效）
+
+# Concurrent Scraping Configuration
+CONCURRENT_TABS = max(1, int(os.getenv("CONCURRENT_TABS", 1)))  # 同时抓取的标签页数量（1 表示逐个抓取）
+TAB_READY_TIMEOUT_SECONDS = int(os.getenv("TAB_READY_TIMEOUT_SECONDS", 30))  # 单个标签页等待推文出现的最长时间（秒）
+PREFETCH_DEPTH = max(0, int(os.getenv("PREFETCH_DEPTH", 0)))  # 逐个抓取时提前在后台标签页中加载后面几个用户（0 表示不预加载）
+SEARCH_BATCH_USERS = os.getenv("SEARCH_BATCH_USERS", "").split(',')  # 合并成搜索查询批量检查的用户（* 表示所有用户），通常是很少发推的用户
+SEARCH_QUERY_MAX_LENGTH = int(os.getenv("SEARCH_QUERY_MAX_LENGTH", 480))  # 单个搜索查询的最大长度（字符），超出时拆分成多个查询
+
+# Engine Configuration
+ENGINE = os.getenv("ENGINE", "sync").lower()  # 监控引擎：sync（同步接口）或 async（asyncio 异步接口）
+USER_SCRAPE_TIMEOUT_SECONDS = int(os.getenv("USER_SCRAPE_TIMEOUT_SECONDS", 120))  # 单个用户抓取的最长时间（秒）
+
+# Sharding Configuration
+SHARD_COUNT = max(1, int(os.getenv("SHARD_COUNT", 1)))  # 工作进程数量，每个进程使用一份克隆的浏览器配置文件（1 表示不分片）
+SHARD_PROFILE_DIR = os.getenv("SHARD_PROFILE_DIR", "browser_profile_shards")  # 克隆的浏览器配置文件存放目录
+
+# Round Timing Configuration
+ROUND_DEADLINE_FRACTION = float(os.getenv("ROUND_DEADLINE_FRACTION", 0.8))  # 每轮的时间预算占检查间隔的比例，超出后剩余用户顺延到下一轮
+
+# Adaptive Scheduling Configuration
+ADAPTIVE_SCHEDULING = os.getenv("ADAPTIVE_SCHEDULING", "false").lower() == "true"  # 是否按每个用户的发推频率单独安排检查间隔
+SCHEDULE_MIN_INTERVAL_SECONDS = int(os.getenv("SCHEDULE_MIN_INTERVAL_SECONDS", 120))  # 单个用户的最小检查间隔（秒）
+SCHEDULE_MAX_INTERVAL_SECONDS = int(os.getenv("SCHEDULE_MAX_INTERVAL_SECONDS", 3600))  # 单个用户的最大检查间隔（秒）
+SCHEDULE_GAP_FRACTION = float(os.getenv("SCHEDULE_GAP_FRACTION", 0.5))  # 检查间隔占平均发推间隔的比例
+SCHEDULE_JITTER = float(os.getenv("SCHEDULE_JITTER", 0.1))  # 检查间隔的随机抖动比例（0.1 表示 ±10%）
+SCHEDULE_STATE_FILE_PATH = os.getenv("SCHEDULE_STATE_FILE_PATH", "data/schedule_state.json")  # 调度状态文件路径
+
+# Resource Blocking Configuration
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "false").lower() == "true"  # 是否拦截监控不需要的资源
+BLOCKED_RESOURCE_TYPES = [t.strip() for t in os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font").split(',') if t.strip()]  # 要拦截的资源类型
+BLOCKED_URL_PATTERNS = [p.strip() for p in os.getenv(
+    "BLOCKED_URL_PATTERNS",
+    "/i/api/1.1/jot/,google-analytics.com,googletagmanager.com,doubleclick.net,ads-twitter.com,ads-api.x.com"
+).split(',') if p.strip()]  # 要拦截的URL片段（统计和广告请求）
+
 # Tweet Date Range Configuration
 DAYS_TO_SCRAPE = int(os.getenv("DAYS_TO_SCRAPE", 3))  # 默认获取最近3天的推文
 MAX_TWEETS_PER_USER = int(os.getenv("MAX_TWEETS_PER_USER", 50))  # 每个用户最多获取的推文数量
+STOP_AT_LAST_SEEN = os.getenv("STOP_AT_LAST_SEEN", "true").lower() == "true"  # 到达上次已见的最新推文时停止滚动
+
+# Tweet Extraction Configuration
+SCRAPE_MODE = os.getenv("SCRAPE_MODE", "dom").lower()  # 推文提取方式: dom（逐个解析页面元素）、batch（一次调用批量提取页面元素）、stream（页面在推文元素出现时推送）或 graphql（解析时间线接口响应）
+NAVIGATION_MODE = os.getenv("NAVIGATION_MODE", "ready").lower()  # 访问用户主页的等待方式: ready（页面结构加载后等待推文出现或识别出失败状态）或 networkidle（等待网络空闲）
+SPA_NAVIGATION = os.getenv("SPA_NAVIGATION", "false").lower() == "true"  # 是否在已加载的 X 应用内切换用户主页（失败时自动改为完整加载）
+SPA_NAVIGATION_TIMEOUT_SECONDS = int(os.getenv("SPA_NAVIGATION_TIMEOUT_SECONDS", 10))  # 应用内切换等待新用户推文出现的最长时间（秒）
+CHANGE_PROBE = os.getenv("CHANGE_PROBE", "false").lower() == "true"  # 是否先比较用户主页的发帖总数，没有变化时跳过推文提取和滚动加载
+
+# Scroll Loading Configuration
+SCROLL_WAIT_MIN_MS = int(os.getenv("SCROLL_WAIT_MIN_MS", 1000))  # 滚动后等待新内容的最短超时（毫秒）
+SCROLL_WAIT_MAX_MS = int(os.getenv("SCROLL_WAIT_MAX_MS", 3000))  # 滚动后等待新内容的最长超时（毫秒）
+SCROLL_WAIT_SETTLE_MS = int(os.getenv("SCROLL_WAIT_SETTLE_MS", 200))  # 检测到新内容后等待渲染完成的时间（毫秒）
 
 # File Paths
+SEEN_STORE_BACKEND = os.getenv("SEEN_STORE_BACKEND", "json").lower()  # 已见推文的存储方式: json（整个文件读写）、sqlite（按需查询，只写入新增的ID）或 binary（有序整数文件，内存映射后二分查找）
 DB_FILE_PATH = os.getenv("DB_FILE_PATH", "data/seen_tweets.json")
+SEEN_JOURNAL_CHECKPOINT_ENTRIES = int(os.getenv("SEEN_JOURNAL_CHECKPOINT_ENTRIES", 1000))  # json 存储的日志达到该条数时重写快照文件
+SEEN_DB_PATH = os.getenv("SEEN_DB_PATH", "data/seen_tweets.db")  # sqlite 存储的数据库路径，首次使用时自动导入 DB_FILE_PATH 中的已见推文
+SEEN_BIN_PATH = os.getenv("SEEN_BIN_PATH", "data/seen_tweets.bin")  # binary 存储的主文件路径，首次使用时自动导入 DB_FILE_PATH 中的已见推文
+SEEN_BIN_MERGE_THRESHOLD = int(os.getenv("SEEN_BIN_MERGE_THRESHOLD", 10000))  # binary 存储的增量达到该数量时合并进主文件
+SEEN_RETENTION_DAYS = int(os.getenv("SEEN_RETENTION_DAYS", 0))  # 已见推文保留天数（按推文ID中的发布时间，0 表示永久保留；至少为 DAYS_TO_SCRAPE + 1）
+SEEN_MAX_PER_USER = int(os.getenv("SEEN_MAX_PER_USER", 0))  # 每个用户保留的已见推文数量（仅 sqlite，0 表示不限制；至少为 MAX_TWEETS_PER_USER）
+SEEN_COMPACTION_INTERVAL_SECONDS = int(os.getenv("SEEN_COMPACTION_INTERVAL_SECONDS", 3600))  # 已见推文清理的最短间隔（秒）
+LAST_SEEN_FILE_PATH = os.getenv("LAST_SEEN_FILE_PATH", "data/last_seen.json")  # 每个用户的已见水位线（最新推文ID、最近已见的推文ID、置顶和转推）
+LAST_SEEN_RECENT_IDS = int(os.getenv("LAST_SEEN_RECENT_IDS", 5))  # 每个用户记录的最近已见推文数量，在这个范围内晚出现的推文仍会被发现
+LAST_SEEN_MAX_EXCEPTIONS = int(os.getenv("LAST_SEEN_MAX_EXCEPTIONS", 20))  # 每个用户记录的最近见过的置顶推文和转推数量
+PROBE_STATE_FILE_PATH = os.getenv("PROBE_STATE_FILE_PATH", "data/probe_state.json")  # 每个用户上次完整抓取时的发帖总数
 
 # Telegram Notification
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -1,15 +1,568 @@
+import bisect
 import json
-from typing import Set
+import mmap
+import os
+import sqlite3
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from . import config, logger, snowflake
+
+# 获取日志器
+log = logger.get_logger('database')
 
 def load_seen_tweet_ids(db_path: str) -> Set[str]:
-    """从JSON文件加载已见推文ID集合"""
+    """从JSON文件加载已见推文ID集合（文件损坏时保留损坏处之前的ID）"""
     try:
         with open(db_path, 'r', encoding='utf-8') as f:
             return set(json.load(f))
-    except (FileNotFoundError, json.JSONDecodeError):
+    except FileNotFoundError:
         return set()
+    except json.JSONDecodeError:
+        tweet_ids = set(iter_json_array(db_path))
+        log.warning(f"已见推文文件 {db_path} 已损坏，从中恢复了 {len(tweet_ids)} 条推文ID")
+        return tweet_ids
 
 def save_seen_tweet_ids(db_path: str, tweet_ids: Set[str]):
-    """将推文ID集合保存到JSON文件"""
+    """将推文ID集合保存到JSON文件（写入临时文件后替换，中途中断不会损坏原文件）"""
+    temp_path = db_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(list(tweet_ids), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, db_path)
+
+def get_journal_path(db_path: str) -> str:
+    return db_path + ".journal"
+
+def replay_journal(journal_path: str) -> List[str]:
+    """读取日志文件中的推文ID，并截掉末尾写入不完整的记录"""
+    try:
+        with open(journal_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    complete = data[:data.rfind(b'\n') + 1]
+    if len(complete) < len(data):
+        with open(journal_path, 'r+b') as f:
+            f.truncate(len(complete))
+    return [line for line in complete.decode('ascii', errors='ignore').split() if line.isdigit()]
+
+def append_journal(journal_path: str, tweet_ids: List[str]):
+    """把推文ID追加到日志文件（每行一个），一次写入所有ID后只同步一次"""
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write(''.join(f"{tweet_id}\n" for tweet_id in tweet_ids))
+        f.flush()
+        os.fsync(f.fileno())
+
+def iter_json_seen_ids(json_path: str) -> Iterator[str]:
+    """逐个读取 JSON 存储中的推文ID（快照文件和日志），文件不存在时跳过"""
+    if os.path.exists(json_path):
+        yield from iter_json_array(json_path)
+    yield from replay_journal(get_journal_path(json_path))
+
+class JsonSeenStore:
+    """
+    JSON 文件中的已见推文ID集合
+
+    打开时读入快照文件并重放日志（<快照文件>.journal）。保存时只把本轮新增的ID追加到日志；
+    日志达到 checkpoint_entries 条时把完整集合写入新的快照（写入临时文件后替换）并清空日志。
+    快照损坏时保留损坏处之前的ID，日志中的ID仍会重放，不会把全部历史推文当作新推文
+    """
+
+    def __init__(self, db_path: str, checkpoint_entries: int = 1000):
+        self.db_path = db_path
+        self.journal_path = get_journal_path(db_path)
+        self.checkpoint_entries = checkpoint_entries
+        self.tweet_ids = load_seen_tweet_ids(db_path)
+        journal = replay_journal(self.journal_path)
+        self.tweet_ids.update(journal)
+        self.journal_entries = len(journal)
+        self.pending = []  # 本轮新增、尚未写入日志的ID
+        self.needs_checkpoint = False  # 清理后需要重写快照
+
+    def __contains__(self, tweet_id: str) -> bool:
+        return tweet_id in self.tweet_ids
+
+    def __len__(self) -> int:
+        return len(self.tweet_ids)
+
+    def add(self, tweet_id: str, user: Optional[str] = None):
+        if tweet_id not in self.tweet_ids:
+            self.tweet_ids.add(tweet_id)
+            self.pending.append(tweet_id)
+
+    def save(self):
+        """把本轮新增的ID追加到日志，日志较长或清理过记录时写入新的快照"""
+        if self.needs_checkpoint or self.journal_entries + len(self.pending) >= self.checkpoint_entries:
+            self.checkpoint()
+        elif self.pending:
+            append_journal(self.journal_path, self.pending)
+            self.journal_entries += len(self.pending)
+            self.pending = []
+
+    def checkpoint(self):
+        """写入完整的快照并清空日志（快照替换后再清空，中途中断时日志中的ID只会重复，不会丢失）"""
+        save_seen_tweet_ids(self.db_path, self.tweet_ids)
+        open(self.journal_path, 'w').close()
+        self.journal_entries = 0
+        self.pending = []
+        self.needs_checkpoint = False
+
+    def compact(self, min_tweet_id: Optional[int] = None, max_per_user: int = 0) -> int:
+        """
+        删除ID小于 min_tweet_id 的记录，返回删除的数量（调用 save 后写入文件）。
+        JSON 文件中没有用户信息，不支持按用户保留数量
+        """
+        if min_tweet_id is None:
+            return 0
+        kept = {tweet_id for tweet_id in self.tweet_ids if int(tweet_id) >= min_tweet_id}
+        removed = len(self.tweet_ids) - len(kept)
+        if removed:
+            self.tweet_ids = kept
+            self.needs_checkpoint = True
+        return removed
+
+    def close(self):
+        pass
+
+class SqliteSeenStore:
+    """
+    SQLite 数据库中的已见推文ID（WAL 模式）
+
+    判断是否已见时按主键查询，不需要把全部历史读入内存；
+    保存时只批量插入本轮新增的ID，耗时与历史记录的数量无关。
+    首次打开时如果存在旧的 JSON 文件，会逐条流式导入
+    """
+
+    def __init__(self, db_path: str, json_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径
+            json_path: 需要导入的旧 JSON 文件路径（只在数据库中还没有导入记录时导入一次）
+        """
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_tweets (
+                tweet_id INTEGER PRIMARY KEY,
+                user TEXT,
+                first_seen INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_tweets_first_seen ON seen_tweets (first_seen);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.pending = {}  # 本轮新增、尚未写入的 {推文ID: 用户名}
+        if json_path:
+            self._migrate_json(json_path)
+
+    def __contains__(self, tweet_id: str) -> bool:
+        if tweet_id in self.pending:
+            return True
+        row = self.conn.execute("SELECT 1 FROM seen_tweets WHERE tweet_id = ?", (int(tweet_id),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0] + len(self.pending)
+
+    def add(self, tweet_id: str, user: Optional[str] = None):
+        self.pending[tweet_id] = user
+
+    def save(self):
+        """批量写入本轮新增的推文ID"""
+        if not self.pending:
+            return
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_tweets (tweet_id, user, first_seen) VALUES (?, ?, ?)",
+                ((int(tweet_id), user, now) for tweet_id, user in self.pending.items()))
+        self.pending = {}
+
+    def compact(self, min_tweet_id: Optional[int] = None, max_per_user: int = 0) -> int:
+        """
+        删除ID小于 min_tweet_id 的记录，并且每个用户只保留ID最大的 max_per_user 条（0 表示不限制），
+        返回删除的数量。从旧 JSON 文件导入的记录没有用户信息，只按ID清理
+        """
+        removed = 0
+        with self.conn:
+            if min_tweet_id is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM seen_tweets WHERE tweet_id < ?", (min_tweet_id,)).rowcount
+            if max_per_user:
+                removed += self.conn.execute("""
+                    DELETE FROM seen_tweets WHERE tweet_id IN (
+                        SELECT tweet_id FROM (
+                            SELECT tweet_id, ROW_NUMBER() OVER (PARTITION BY user ORDER BY tweet_id DESC) AS rank
+                            FROM seen_tweets WHERE user IS NOT NULL
+                        ) WHERE rank > ?
+                    )""", (max_per_user,)).rowcount
+        if removed:
+            # 释放删除记录占用的空间，数据库文件大小随之缩小
+            self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.conn.close()
+
+    def _migrate_json(self, json_path: str):
+        """从旧的 JSON 文件导入已见推文ID（每个数据库只导入一次）"""
+        key = f"migrated:{os.path.abspath(json_path)}"
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_tweets (tweet_id, user, first_seen) VALUES (?, NULL, ?)",
+                ((int(tweet_id), now) for tweet_id in iter_json_seen_ids(json_path)))
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(int(time.time()))))
+
+class BinarySeenStore:
+    """
+    二进制文件中的已见推文ID
+
+    主文件是按升序排列的 64 位无符号整数（本机字节序，与 array('Q') 和 numpy.uint64 的格式一致），
+    每个ID只占 8 字节。打开时内存映射主文件，判断是否已见时二分查找，不需要把全部ID读入内存。
+    新增的ID追加到增量文件（<主文件>.delta）并保存在内存中，增量达到 merge_threshold 条时
+    合并进主文件（写入临时文件后替换）。首次打开时如果存在旧的 JSON 文件，会逐条流式导入
+    """
+
+    ITEM_SIZE = array('Q').itemsize
+    _EMPTY = memoryview(b'').cast('Q')
+
+    def __init__(self, db_path: str, json_path: Optional[str] = None, merge_threshold: int = 10000):
+        """
+        Args:
+            db_path: 主文件路径
+            json_path: 需要导入的旧 JSON 文件路径（只在主文件不存在时导入）
+            merge_threshold: 增量达到该数量时合并进主文件
+        """
+        self.db_path = db_path
+        self.delta_path = db_path + ".delta"
+        self.merge_threshold = merge_threshold
+        self.file = None
+        self.mmap = None
+        self.ids = self._EMPTY  # 主文件中的ID（内存映射的 memoryview）
+        self.delta = set()  # 已写入增量文件、尚未合并的ID
+        self.pending = set()  # 本轮新增、尚未写入的ID
+
+        if not os.path.exists(db_path):
+            tweet_ids = array('Q')
+            if json_path:
+                tweet_ids.extend(sorted({int(tweet_id) for tweet_id in iter_json_seen_ids(json_path)}))
+            self._write_main(tweet_ids)
+        self._open_main()
+        self._load_delta()
+
+    def __contains__(self, tweet_id: str) -> bool:
+        tweet_id = int(tweet_id)
+        return tweet_id in self.pending or tweet_id in self.delta or self._in_main(tweet_id)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.delta) + len(self.pending)
+
+    def add(self, tweet_id: str, user: Optional[str] = None):
+        if tweet_id not in self:
+            self.pending.add(int(tweet_id))
+
+    def save(self):
+        """把本轮新增的ID追加到增量文件，增量较多时合并进主文件"""
+        if not self.pending:
+            return
+        with open(self.delta_path, 'ab') as f:
+            array('Q', self.pending).tofile(f)
+        self.delta |= self.pending
+        self.pending = set()
+        if len(self.delta) >= self.merge_threshold:
+            self.merge()
+
+    def merge(self, min_tweet_id: Optional[int] = None) -> int:
+        """
+        把增量合并进主文件，同时删除ID小于 min_tweet_id 的记录，返回删除的数量
+
+        主文件和增量都是有序的，按顺序分段写入新文件，不需要把主文件读入内存
+        """
+        start = bisect.bisect_left(self.ids, min_tweet_id) if min_tweet_id is not None else 0
+        delta = sorted(tweet_id for tweet_id in self.delta
+                       if min_tweet_id is None or tweet_id >= min_tweet_id)
+        removed = start + len(self.delta) - len(delta)
+
+        temp_path = self.db_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            position = start
+            for tweet_id in delta:
+                index = bisect.bisect_left(self.ids, tweet_id, position)
+                f.write(self.ids[position:index])
+                array('Q', [tweet_id]).tofile(f)
+                position = index
+            f.write(self.ids[position:])
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._close_main()
+        os.replace(temp_path, self.db_path)
+        # 主文件替换后再清空增量文件，中途中断时增量中的ID只会重复，不会丢失
+        open(self.delta_path, 'wb').close()
+        self.delta = set()
+        self._open_main()
+        return removed
+
+    def compact(self, min_tweet_id: Optional[int] = None, max_per_user: int = 0) -> int:
+        """
+        删除ID小于 min_tweet_id 的记录并合并增量，返回删除的数量。
+        二进制文件中没有用户信息，不支持按用户保留数量
+        """
+        self.save()
+        if min_tweet_id is None:
+            return 0
+        return self.merge(min_tweet_id)
+
+    def close(self):
+        self._close_main()
+
+    def _in_main(self, tweet_id: int) -> bool:
+        index = bisect.bisect_left(self.ids, tweet_id)
+        return index < len(self.ids) and self.ids[index] == tweet_id
+
+    def _write_main(self, tweet_ids: array):
+        temp_path = self.db_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            tweet_ids.tofile(f)
+        os.replace(temp_path, self.db_path)
+
+    def _open_main(self):
+        self.file = open(self.db_path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        # 长度为 0 的文件不能内存映射
+        if size >= self.ITEM_SIZE:
+            self.mmap = mmap.mmap(self.file.fileno(), size - size % self.ITEM_SIZE, access=mmap.ACCESS_READ)
+            self.ids = memoryview(self.mmap).cast('Q')
+
+    def _close_main(self):
+        # memoryview 释放之后才能关闭内存映射
+        if self.ids is not self._EMPTY:
+            self.ids.release()
+        self.ids = self._EMPTY
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _load_delta(self):
+        """读取增量文件（忽略末尾不完整的记录和主文件中已有的ID）"""
+        if not os.path.exists(self.delta_path):
+            return
+        with open(self.delta_path, 'rb') as f:
+            data = f.read()
+        delta = array('Q')
+        delta.frombytes(data[:len(data) - len(data) % self.ITEM_SIZE])
+        self.delta = {tweet_id for tweet_id in delta if not self._in_main(tweet_id)}
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator:
+    """逐个读取 JSON 数组文件中的元素，不把整个文件读入内存；文件不完整时读到损坏处为止"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            return
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if buffer.startswith(']'):
+                return
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                end = -1
+            # 元素可能在分块处被截断（数字没有结束标记），后面还有内容或已到文件末尾时才算读完整
+            if end != -1 and (end < len(buffer) or eof):
+                yield value
+                buffer = buffer[end:]
+                continue
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+def get_retention_policy() -> Tuple[Optional[int], int]:
+    """
+    按配置计算已见推文的保留范围
+
+    早于抓取范围（DAYS_TO_SCRAPE）的推文不会再被抓取到，删除后也不会被当作新推文，
+    因此保留天数至少比抓取范围多一天；每个用户保留的数量至少为 MAX_TWEETS_PER_USER
+
+    Returns:
+        tuple: (保留的最小推文ID，不按时间清理时为 None; 每个用户保留的数量，0 表示不限制)
+    """
+    min_tweet_id = None
+    if config.SEEN_RETENTION_DAYS > 0:
+        retention_days = max(config.SEEN_RETENTION_DAYS, config.DAYS_TO_SCRAPE + 1)
+        min_tweet_id = snowflake.datetime_to_snowflake(datetime.utcnow() - timedelta(days=retention_days))
+    max_per_user = config.SEEN_MAX_PER_USER
+    if max_per_user > 0:
+        max_per_user = max(max_per_user, config.MAX_TWEETS_PER_USER)
+    return min_tweet_id, max_per_user
+
+def open_seen_store(backend: Optional[str] = None, db_path: Optional[str] = None):
+    """
+    打开已见推文存储
+
+    Args:
+        backend: json、sqlite 或 binary，默认使用 config.SEEN_STORE_BACKEND
+        db_path: 存储文件路径，默认使用 config.DB_FILE_PATH（json）、config.SEEN_DB_PATH（sqlite）
+            或 config.SEEN_BIN_PATH（binary）
+
+    Returns:
+        支持 `tweet_id in store`、store.add(tweet_id, user)、store.save() 和 store.close() 的存储对象
+    """
+    backend = backend or config.SEEN_STORE_BACKEND
+    if backend == "sqlite":
+        return SqliteSeenStore(db_path or config.SEEN_DB_PATH, json_path=config.DB_FILE_PATH)
+    if backend == "binary":
+        return BinarySeenStore(db_path or config.SEEN_BIN_PATH, json_path=config.DB_FILE_PATH,
+                               merge_threshold=config.SEEN_BIN_MERGE_THRESHOLD)
+    return JsonSeenStore(db_path or config.DB_FILE_PATH, checkpoint_entries=config.SEEN_JOURNAL_CHECKPOINT_ENTRIES)
+
+def load_last_seen_ids(db_path: str) -> Dict[str, Dict]:
+    """
+    从JSON文件加载每个用户的已见水位线
+
+    旧格式中每个用户只有一个最新推文ID，读取后转换为只有 max_id 的水位线
+    """
+    try:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            data = dict(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {user: mark if isinstance(mark, dict) else {'max_id': mark} for user, mark in data.items()}
+
+def save_last_seen_ids(db_path: str, marks: Dict[str, Dict]):
+    """将每个用户的已见水位线保存到JSON文件"""
+    with open(db_path, 'w', encoding='utf-8') as f:
+        json.dump(marks, f, indent=2)
+
+class SeenMarks:
+    """
+    每个用户（或列表）已见推文的水位线，判断推文是否已见时不需要查询全部历史
+
+    推文ID按时间递增，每个用户时间线中的普通推文按ID从大到小排列，因此每个用户只需要记录:
+    - max_id: 已见的最大推文ID
+    - recent: 已见的最新 recent_size 条推文ID（从新到旧）。ID在 recent 范围内却不在其中的推文是晚出现的推文
+      （发布后才对外可见、页面加载较晚等），仍需要查询已见推文存储；比 recent 更早的推文都视为已见
+    - exceptions: 最近见过的置顶推文和转推。它们显示的是原推文ID，与时间线位置无关，不在其中时需要查询已见推文存储
+
+    比 max_id 更新的推文也需要查询已见推文存储，同一条推文可能已经从列表或搜索中见过
+    """
+
+    def __init__(self, db_path: str, recent_size: int = 5, max_exceptions: int = 20):
+        self.db_path = db_path
+        self.recent_size = recent_size
+        self.max_exceptions = max_exceptions
+        self.marks = load_last_seen_ids(db_path)
+        self.dirty = False
+
+    def get_since_id(self, user: str) -> Optional[str]:
+        """
+        返回抓取时可以停止的推文ID（recent 中最早的ID）：不晚于它的普通推文都已见过，
+        在它与 max_id 之间的推文交给 is_seen 判断，以便发现晚出现的推文
+        """
+        mark = self.marks.get(user) or {}
+        recent = mark.get('recent')
+        return recent[-1] if recent else mark.get('max_id')
+
+    def get_since_ids(self, users) -> Dict[str, Optional[str]]:
+        return {user: self.get_since_id(user) for user in users}
+
+    def is_seen(self, user: str, tweet) -> bool:
+        """
+        按水位线判断推文是否确定已见
+
+        Returns:
+            bool: True 表示确定已见；False 表示可能是新推文，需要再查询已见推文存储
+        """
+        mark = self.marks.get(user) or {}
+        if tweet.is_pinned or tweet.is_retweet:
+            return tweet.id_str in mark.get('exceptions', ())
+        if not mark.get('max_id') or tweet.id > int(mark['max_id']):
+            return False
+        recent = mark.get('recent')
+        if not recent:
+            return True
+        return tweet.id_str in recent or tweet.id < int(recent[-1])
+
+    def update(self, user: str, tweets, complete: bool = True):
+        """
+        用本次抓取到的推文更新水位线（包括已见和新发现的推文）
+
+        Args:
+            complete: 抓取是否检查到了上次已见的推文。提前结束（截止时间、滚动次数或数量上限）时，
+                      本次推文与上次已见推文之间可能有没有检查的推文，保持原来的水位线，
+                      下一轮继续检查到原来的位置（本次找到的推文已在已见推文存储中）
+        """
+        mark = self.marks.get(user) or {}
+        timeline_ids = set()
+        if complete or not mark.get('max_id'):
+            timeline_ids = {tweet.id for tweet in tweets if not tweet.is_pinned and not tweet.is_retweet}
+        exception_ids = [tweet.id_str for tweet in tweets if tweet.is_pinned or tweet.is_retweet]
+        if mark.get('max_id'):
+            timeline_ids.add(int(mark['max_id']))
+        timeline_ids.update(int(tweet_id) for tweet_id in mark.get('recent', ()))
+        if not timeline_ids and not exception_ids:
+            return
+
+        exceptions = [tweet_id for tweet_id in mark.get('exceptions', []) if tweet_id not in exception_ids]
+        new_mark = {}
+        if timeline_ids:
+            recent = sorted(timeline_ids, reverse=True)[:self.recent_size]
+            new_mark['max_id'] = str(recent[0])
+            new_mark['recent'] = [str(tweet_id) for tweet_id in recent]
+        new_mark['exceptions'] = (exceptions + exception_ids)[-self.max_exceptions:]
+        if new_mark != mark:
+            self.marks[user] = new_mark
+            self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            save_last_seen_ids(self.db_path, self.marks)
+            self.dirty = False
+
+def open_seen_marks() -> SeenMarks:
+    """按配置打开已见水位线"""
+    return SeenMarks(config.LAST_SEEN_FILE_PATH, config.LAST_SEEN_RECENT_IDS, config.LAST_SEEN_MAX_EXCEPTIONS)
+
+def load_schedule_state(db_path: str) -> Dict[str, Dict]:
+    """从JSON文件加载每个用户的调度状态"""
+    try:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            return dict(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_schedule_state(db_path: str, state: Dict[str, Dict]):
+    """将每个用户的调度状态保存到JSON文件"""
+    with open(db_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+def load_probe_state(db_path: str) -> Dict[str, int]:
+    """从JSON文件加载每个用户上次完整抓取时的主页指纹"""
+    try:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            return dict(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_probe_state(db_path: str, fingerprints: Dict[str, int]):
+    """将每个用户的主页指纹保存到JSON文件"""
     with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(list(tweet_ids), f, indent=2)
\ No newline at end of file
+        json.dump(fingerprints, f, indent=2)
@@ -1,128 +1,237 @@
 import os
 import time
-from playwright.sync_api import sync_playwright, Playwright
-from . import config, database, notifier, scraper, logger, browser_config
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import config, database, scraper, logger, browser_config, browser_manager, tab_pool, processing, scheduler, multi_timeline
+from .models import Tweet
 
 # 获取日志器
 log = logger.get_logger('main')
 
-def process_all_users():
-    """主处理函数，监控所有配置的用户"""
+def _scrape_sequentially(page, users: List[str], since_ids: Dict[str, str],
+                         deadline: Optional[float] = None) -> Iterator[Tuple[str, List[Tweet]]]:
+    """在同一个页面上依次抓取每个用户，到达截止时间后剩余的用户不再抓取"""
+    for index, user in enumerate(users):
+        user_deadline = None
+        if deadline is not None:
+            now = time.monotonic()
+            if now >= deadline:
+                log.warning(f"本轮时间预算已用完，{len(users) - index} 个用户顺延到下一轮")
+                return
+            # 剩余时间平均分给尚未检查的用户
+            user_deadline = now + (deadline - now) / (len(users) - index)
+        logger.log_scraping_start(user, config.DAYS_TO_SCRAPE, config.MAX_TWEETS_PER_USER)
+        yield user, scraper.scrape_user_tweets(page, user, since_ids.get(user), user_deadline)
+
+
+def scrape_users(browser: browser_manager.BrowserManager, users: List[str], since_ids: Dict[str, str],
+                 deadline: Optional[float] = None) -> Iterator[Tuple[str, List[Tweet]]]:
+    """
+    按配置使用并发标签页或单个页面抓取一组用户，返回 (用户名, 推文列表)
+
+    传入 deadline（time.monotonic() 时间）时，到期后不再开始抓取新的用户
+
+    列表来源（list:<列表ID>）和配置为搜索批量检查的用户先通过多人时间线检查，其余用户再逐个打开主页
+    """
+    page = browser.ensure_ready()
+
+    list_sources = [user for user in users if multi_timeline.is_list_source(user)]
+    search_users = multi_timeline.get_search_batch_users(users)
+    if list_sources or search_users:
+        users = [user for user in users if user not in list_sources and user not in search_users]
+        multi_deadline = deadline
+        if deadline is not None:
+            # 每个列表、每个搜索查询和每个单独抓取的用户各算一份时间预算
+            unit_count = multi_timeline.count_units(list_sources, search_users)
+            now = time.monotonic()
+            multi_deadline = now + max(0.0, deadline - now) * unit_count / (unit_count + len(users))
+        yield from multi_timeline.scrape_multi_timelines(page, list_sources, search_users, since_ids, multi_deadline)
+        if not users:
+            return
+
+    if config.CONCURRENT_TABS > 1:
+        pool = tab_pool.TabPool(browser.context, config.CONCURRENT_TABS, first_page=page)
+        try:
+            yield from pool.scrape_users(users, since_ids, deadline)
+        finally:
+            pool.close()
+    elif config.PREFETCH_DEPTH > 0:
+        # 按顺序抓取，同时在其他标签页中提前加载后面的用户
+        pool = tab_pool.TabPool(browser.context, config.PREFETCH_DEPTH + 1, first_page=page)
+        try:
+            yield from pool.scrape_users(users, since_ids, deadline, in_order=True)
+        finally:
+            pool.close()
+    else:
+        yield from _scrape_sequentially(page, users, since_ids, deadline)
+
+
+def get_monitor_sources() -> List[str]:
+    """返回所有监控来源：配置的用户和列表（list:<列表ID>）"""
+    users = [user.strip() for user in config.TARGET_USERS if user.strip()]
+    return users + multi_timeline.get_list_sources()
+
+
+def process_all_users(browser: Optional[browser_manager.BrowserManager] = None,
+                      users: Optional[List[str]] = None,
+                      user_scheduler: Optional[scheduler.UserScheduler] = None,
+                      deadline: Optional[float] = None) -> Tuple[int, List[str]]:
+    """
+    主处理函数，监控所有配置的用户
+
+    Args:
+        browser: 跨轮次复用的浏览器管理器；为 None 时本轮单独启动并关闭浏览器
+        users: 本轮要检查的用户，默认检查所有配置的用户
+        user_scheduler: 自适应调度器；传入时每个用户抓取后更新其发推频率并安排下一次检查
+        deadline: 本轮的截止时间（time.monotonic() 时间），到期后剩余的用户不再检查
+
+    Returns:
+        tuple: (新推文数量, 本轮未检查的用户列表)
+    """
     logger.log_round_start()
-    seen_tweet_ids = database.load_seen_tweet_ids(config.DB_FILE_PATH)
-    all_new_tweets = []
 
     # 检查浏览器配置文件是否存在
     if not os.path.exists(browser_config.USER_DATA_DIR):
         log.error(f"浏览器配置文件目录 '{browser_config.USER_DATA_DIR}' 未找到")
         log.error("请先运行 'python initialize_profile.py' 来完成首次登录和初始化")
-        return
+        # 本轮没有检查任何用户，全部作为未检查返回，调用方据此重新安排
+        return 0, list(users if users is not None else get_monitor_sources())
 
-    with sync_playwright() as p:
-        context = None # 先声明 context
-        try:
-            # === 使用统一的浏览器配置，确保与initialize_profile.py完全一致 ===
-            headless_mode, slow_mo = browser_config.get_main_browser_config()
-            
-            # 记录浏览器模式
-            is_visual_mode = config.ENABLE_VISUAL_SCRAPING
-            if is_visual_mode:
-                log.info("启用可视化抓取模式 - 浏览器窗口将可见")
-                log.info(f"可视化延迟: {slow_mo} 毫秒")
-            else:
-                log.info(f"浏览器模式: {'无头模式' if headless_mode else '可视模式'}")
-            
-            # 创建浏览器上下文和页面
-            context = browser_config.create_browser_context(p, headless_mode, slow_mo)
-            page = browser_config.create_configured_page(context)
-            # =====================
-
-            for user in config.TARGET_USERS:
-                if not user: continue
-                
-                user = user.strip()
-                logger.log_scraping_start(user, config.DAYS_TO_SCRAPE, config.MAX_TWEETS_PER_USER)
-                
-                found_tweets = scraper.scrape_user_tweets(page, user)
-                new_tweets_count = 0
-                
-                log.info(f"用户 {user}: 检查 {len(found_tweets)} 条推文是否为新推文...")
-                
-                for tweet in found_tweets:
-                    is_new = tweet['id'] not in seen_tweet_ids
-                    
-                    # 记录推文发现
-                    logger.log_tweet_found(
-                        tweet['user'], 
-                        tweet['id'], 
-                        tweet['timestamp'], 
-                        tweet['text'], 
-                        is_new
-                    )
-                    
-                    if is_new:
-                        all_new_tweets.append(tweet)
-                        seen_tweet_ids.add(tweet['id'])
-                        new_tweets_count += 1
-                
-                logger.log_scraping_result(user, len(found_tweets), new_tweets_count)
-        
-        except Exception as e:
-            log.error(f"Playwright 执行过程中发生未知错误: {e}", exc_info=True)
-        finally:
-            if context:
-                context.close()
+    # 确认可以开始本轮之后再打开存储，之后的每条路径都会通过 save_round_state 关闭
+    seen_store = database.open_seen_store()
+    seen_marks = database.open_seen_marks()
+    all_new_tweets = []
+
+    # 未传入浏览器管理器时，本轮单独启动浏览器并在结束时关闭
+    owns_browser = browser is None
+    if owns_browser:
+        browser = browser_manager.BrowserManager()
+
+    if users is None:
+        users = get_monitor_sources()
+    since_ids = seen_marks.get_since_ids(users) if config.STOP_AT_LAST_SEEN else {}
+    checked_users = set()
+
+    try:
+        for user, found_tweets in scrape_users(browser, users, since_ids, deadline):
+            checked_users.add(user)
+            all_new_tweets.extend(processing.check_user_tweets(user, found_tweets, seen_store, seen_marks))
+            if user_scheduler:
+                user_scheduler.observe(user, found_tweets)
+
+    except Exception as e:
+        log.error(f"Playwright 执行过程中发生未知错误: {e}", exc_info=True)
+    finally:
+        scraper.log_navigation_summary()
+        scraper.log_probe_summary()
+        browser.end_round()
+        if owns_browser:
+            browser.stop()
 
     if all_new_tweets:
-        # 按时间戳排序，最新的推文先通知
-        all_new_tweets.sort(key=lambda x: x['timestamp'], reverse=True)
-        log.info(f"准备发送 {len(all_new_tweets)} 条新推文通知（按时间从新到旧）")
-        
-        # 显示将要发送通知的推文列表
-        log.info("新推文通知列表:")
-        for i, tweet in enumerate(all_new_tweets):
-            log.info(f"  {i+1}. 用户: {tweet['user']}, ID: {tweet['id']}, 时间: {tweet['timestamp']}")
-        
-        for tweet in all_new_tweets:
-            message = (
-                f"<b>新动态!</b>\n\n"
-                f"<b>用户:</b> {tweet['user']}\n"
-                f"<b>内容:</b>\n{tweet['text'][:1000]}\n\n" # 限制长度避免消息过长
-                f"<a href='{tweet['url']}'>查看原文</a>"
-            )
-            success = notifier.send_telegram_notification(message, tweet['user'])
-            logger.log_notification_sent(tweet['user'], tweet['id'], success)
-            time.sleep(1) # 短暂延迟，避免触发Telegram的速率限制
-
-        database.save_seen_tweet_ids(config.DB_FILE_PATH, seen_tweet_ids)
-        log.info(f"处理完成，共发现 {len(all_new_tweets)} 条新推文，数据库已更新")
-    
-    logger.log_round_end(len(all_new_tweets), config.MONITOR_INTERVAL_SECONDS)
+        processing.notify_new_tweets(all_new_tweets)
+
+    processing.save_round_state(seen_store, seen_marks, len(all_new_tweets))
+    scraper.save_probe_state()
+
+    return len(all_new_tweets), [user for user in users if user not in checked_users]
+
+
+def _run_fixed_interval(browser: Optional[browser_manager.BrowserManager]):
+    """在固定的时间点循环检查所有用户，上一轮未检查的用户在下一轮优先检查"""
+    users = get_monitor_sources()
+    clock = scheduler.RoundClock(config.MONITOR_INTERVAL_SECONDS)
+    rolled_over = []
+
+    while True:
+        deadline = clock.wait_for_next_tick()
+        round_users = rolled_over + [user for user in users if user not in rolled_over]
+        new_tweets_count, rolled_over = process_all_users(browser, round_users, deadline=deadline)
+        clock.end_round(len(rolled_over))
+        logger.log_round_end(new_tweets_count, int(clock.seconds_until_next_tick()))
+
+
+def _run_scheduled(browser: Optional[browser_manager.BrowserManager]):
+    """按每个用户各自的检查间隔循环检查，每次只检查已到期的用户"""
+    users = get_monitor_sources()
+    user_scheduler = scheduler.UserScheduler(users)
+    user_scheduler.log_schedule()
+
+    while True:
+        due_users = user_scheduler.pop_due()
+        if due_users:
+            deadline = time.monotonic() + config.MONITOR_INTERVAL_SECONDS * config.ROUND_DEADLINE_FRACTION
+            new_tweets_count, unchecked_users = process_all_users(browser, due_users, user_scheduler, deadline)
+            for user in unchecked_users:
+                if len(unchecked_users) < len(due_users):
+                    # 因时间预算用完而未检查的用户，立即顺延到下一轮
+                    user_scheduler.mark_due(user)
+                else:
+                    # 整轮都没有抓取结果（如浏览器启动失败），按已有的频率估计重新安排，避免立即重试
+                    user_scheduler.reschedule(user)
+            # pop_due 取出的用户在重新安排之前不会再次到期；抓取中途出错而既没有结果、也不在未检查列表中的用户，
+            # 同样按已有的频率估计重新安排，避免从调度中丢失
+            scheduled_users = user_scheduler.get_next_due_times()
+            for user in due_users:
+                if user not in scheduled_users:
+                    user_scheduler.reschedule(user)
+            user_scheduler.save()
+            user_scheduler.log_schedule()
+            logger.log_round_end(new_tweets_count, int(user_scheduler.seconds_until_next_due()))
+        time.sleep(user_scheduler.seconds_until_next_due())
 
 
 def main():
     """主入口函数"""
     log.info("X Monitor 启动")
     log.info(f"监控用户: {', '.join([u.strip() for u in config.TARGET_USERS if u.strip()])}")
+    if multi_timeline.get_list_sources():
+        log.info(f"监控列表: {', '.join(multi_timeline.get_list_sources())}")
     log.info(f"检查间隔: {config.MONITOR_INTERVAL_SECONDS} 秒")
     log.info(f"抓取天数: {config.DAYS_TO_SCRAPE} 天")
     log.info(f"每用户最大推文数: {config.MAX_TWEETS_PER_USER} 条")
     log.info(f"无头模式: {'启用' if config.HEADLESS_MODE else '禁用'}")
     log.info(f"可视化抓取: {'启用' if config.ENABLE_VISUAL_SCRAPING else '禁用'}")
+    log.info(f"浏览器复用: {'启用' if config.KEEP_BROWSER_ALIVE else '禁用'}")
+    log.info(f"并发标签页: {config.CONCURRENT_TABS} 个")
+    if config.CONCURRENT_TABS == 1 and config.PREFETCH_DEPTH > 0:
+        log.info(f"预加载深度: {config.PREFETCH_DEPTH} 个用户")
+    log.info(f"自适应调度: {'启用' if config.ADAPTIVE_SCHEDULING else '禁用'}")
     if config.ENABLE_VISUAL_SCRAPING:
         log.info(f"可视化延迟: {config.VISUAL_SCRAPING_SLOW_MO} 毫秒")
     
-    round_num = 1
+    if config.SHARD_COUNT > 1 or config.ENGINE == "async":
+        try:
+            if config.SHARD_COUNT > 1:
+                log.info(f"分片工作进程: {config.SHARD_COUNT} 个")
+                from . import sharding
+                sharding.run()
+            else:
+                log.info("监控引擎: async")
+                from . import async_engine
+                async_engine.run()
+        except KeyboardInterrupt:
+            log.info("收到中断信号，正在停止 X Monitor...")
+        except Exception as e:
+            log.error(f"程序发生未预期错误: {e}", exc_info=True)
+        finally:
+            log.info("X Monitor 已停止")
+        return
+
+    # 跨轮次复用同一个浏览器，避免每轮重复启动
+    browser = browser_manager.BrowserManager() if config.KEEP_BROWSER_ALIVE else None
+
     try:
-        while True:
-            process_all_users()
-            time.sleep(config.MONITOR_INTERVAL_SECONDS)
-            round_num += 1
+        if config.ADAPTIVE_SCHEDULING:
+            _run_scheduled(browser)
+        else:
+            _run_fixed_interval(browser)
     except KeyboardInterrupt:
         log.info("收到中断信号，正在停止 X Monitor...")
     except Exception as e:
         log.error(f"程序发生未预期错误: {e}", exc_info=True)
     finally:
+        if browser:
+            browser.stop()
         log.info("X Monitor 已停止")
 
 
@@ -0,0 +1,48 @@
+"""
+数据模型
+推文在抓取、处理、通知和日志之间以 Tweet 记录传递
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+
+class Tweet(NamedTuple):
+    """
+    一条推文（不可变，可以在进程之间传递）
+
+    多进程分片的结果队列直接传递 Tweet：NamedTuple 按元组序列化，不需要额外转换成字典
+
+    转推与页面上的显示保持一致：使用被转推的原推文的 ID、内容和时间，并通过 is_retweet 标记
+    """
+    id: int
+    user: str  # 监控的用户名（列表时间线中为推文作者）
+    text: str
+    url: str
+    created_at: datetime  # 带 UTC 时区的发布时间
+    is_pinned: bool = False
+    is_retweet: bool = False
+    is_reply: bool = False  # 只有 graphql 模式能识别回复
+    media: Tuple[Dict, ...] = ()  # 只有 graphql 模式会解析媒体
+
+    @property
+    def id_str(self) -> str:
+        """字符串形式的推文ID（已见推文数据库中的格式）"""
+        return str(self.id)
+
+    @property
+    def timestamp(self) -> str:
+        """发布时间的 ISO 格式字符串（UTC，不含时区信息，与日志和已保存的调度状态格式一致）"""
+        return self.created_at.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class TweetList(list):
+    """
+    一次抓取的结果：按时间从新到旧排序的 Tweet 列表
+
+    complete 表示抓取是否检查到了上次已见的推文（或日期范围的边界）。因截止时间、滚动次数或数量上限
+    提前结束时为 False，此时本次找到的推文与上次已见的推文之间可能还有没有检查到的推文
+    """
+
+    def __init__(self, tweets: Iterable[Tweet] = (), complete: bool = True):
+        super().__init__(tweets)
+        self.complete = complete
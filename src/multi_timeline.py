@@ -0,0 +1,154 @@
+"""
+多人时间线抓取模块
+很少发推的用户每轮单独打开主页，大部分时间都花在加载没有新内容的页面上。
+这里加载一个包含多个用户推文的时间线，一次检查一组用户，再按推文作者区分：
+
+搜索批量检查: 把多个用户合并成一个搜索查询（from:a OR from:b），加载搜索结果页（最新），
+             按作者把结果分给各个用户。通过 SEARCH_BATCH_USERS 指定使用搜索批量检查的用户。
+列表时间线: 读取 X 列表的时间线，列表作为一个监控来源（名称为 list:<列表ID>），
+           每条推文的 user 字段是其作者。通过 TARGET_LISTS 指定列表ID。
+
+与用户主页的区别:
+    不包含置顶推文和转推（转推的地址是原推文作者，无法识别转推者）
+    搜索查询带 -filter:replies 排除回复，与主页“帖子”标签一致，但回复自己的推文串也会被排除
+    搜索索引可能比主页晚几秒到几分钟
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from . import config, logger, scraper, timeline_parser
+from .models import Tweet
+
+# 获取日志器
+log = logger.get_logger('multi_timeline')
+
+# 搜索结果页（按时间排序）
+SEARCH_URL = "https://x.com/search?q={query}&src=typed_query&f=live"
+
+# 列表时间线页面
+LIST_URL = "https://x.com/i/lists/{list_id}"
+
+# 列表来源名称的前缀，与用户名一起出现在本轮的检查列表、last_seen 和调度状态中
+LIST_SOURCE_PREFIX = "list:"
+
+
+def get_list_sources() -> List[str]:
+    """返回配置的所有列表来源名称（list:<列表ID>）"""
+    return [f"{LIST_SOURCE_PREFIX}{list_id.strip()}" for list_id in config.TARGET_LISTS if list_id.strip()]
+
+
+def is_list_source(name: str) -> bool:
+    return name.startswith(LIST_SOURCE_PREFIX)
+
+
+def get_search_batch_users(users: List[str]) -> List[str]:
+    """返回 users 中配置为使用搜索批量检查的用户，保持原有顺序"""
+    configured = [user.strip().lower() for user in config.SEARCH_BATCH_USERS if user.strip()]
+    users = [user for user in users if not is_list_source(user)]
+    if '*' in configured:
+        return users
+    return [user for user in users if user.lower() in configured]
+
+
+def build_search_queries(users: List[str], days: Optional[int] = None,
+                         max_length: Optional[int] = None) -> List[Tuple[str, List[str]]]:
+    """
+    把用户列表拆分成若干个搜索查询，每个查询不超过 max_length 个字符
+
+    Args:
+        days: 只搜索最近几天的推文，默认使用 config.DAYS_TO_SCRAPE
+        max_length: 单个查询的最大长度，默认使用 config.SEARCH_QUERY_MAX_LENGTH
+
+    Returns:
+        list: [(查询语句, 该查询包含的用户列表), ...]
+    """
+    days = config.DAYS_TO_SCRAPE if days is None else days
+    max_length = config.SEARCH_QUERY_MAX_LENGTH if max_length is None else max_length
+    since = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+    # 用户主页的“帖子”标签不显示回复，搜索结果也排除回复，两种检查方式看到的推文保持一致
+    suffix = f" -filter:replies since:{since}"
+
+    def build(chunk: List[str]) -> str:
+        return "(" + " OR ".join(f"from:{user}" for user in chunk) + ")" + suffix
+
+    queries = []
+    chunk = []
+    for user in users:
+        if chunk and len(build(chunk + [user])) > max_length:
+            queries.append((build(chunk), chunk))
+            chunk = []
+        chunk.append(user)
+    if chunk:
+        queries.append((build(chunk), chunk))
+    return queries
+
+
+def count_units(list_sources: List[str], search_users: List[str]) -> int:
+    """多人时间线的抓取单位数（每个列表和每个搜索查询各算一个），用于分配时间预算"""
+    return len(list_sources) + (len(build_search_queries(search_users)) if search_users else 0)
+
+
+def _scrape_timeline(page, label: str, url: str, collector: scraper.MultiAuthorCollector,
+                     operations, deadline: Optional[float]) -> Optional[List[Tweet]]:
+    """
+    抓取一个多人时间线页面
+
+    Returns:
+        list: 按时间从新到旧排序的推文列表；页面加载失败时返回 None
+    """
+    scrape = scraper.TimelineScrape(page, label, deadline=deadline, url=url,
+                                    collector=collector, operations=operations)
+    if not scrape.navigate():
+        return None
+    return scrape.collect()
+
+
+def scrape_multi_timelines(page, list_sources: List[str], search_users: List[str], since_ids: Dict[str, str],
+                           deadline: Optional[float] = None) -> Iterator[Tuple[str, List[Tweet]]]:
+    """
+    抓取列表时间线和搜索批量查询
+
+    每个列表返回一次 (list:<列表ID>, 推文列表)，推文的 user 字段是其作者；
+    搜索批量检查的每个用户返回一次 (用户名, 推文列表)。
+
+    每个列表或搜索查询视为一个抓取单位，剩余时间平均分给尚未执行的单位；
+    到达截止时间后剩余单位中的来源不再返回（顺延到下一轮）。
+    页面加载失败的单位中的来源也不返回，避免被当作已检查
+    """
+    units = [(source, [source]) for source in list_sources]
+    if search_users:
+        units.extend(build_search_queries(search_users))
+
+    for index, (unit, sources) in enumerate(units):
+        unit_deadline = None
+        if deadline is not None:
+            now = time.monotonic()
+            if now >= deadline:
+                remaining = sum(len(unit_sources) for _, unit_sources in units[index:])
+                log.warning(f"本轮时间预算已用完，{remaining} 个多人时间线来源顺延到下一轮")
+                return
+            unit_deadline = now + (deadline - now) / (len(units) - index)
+
+        if is_list_source(unit):
+            list_id = unit[len(LIST_SOURCE_PREFIX):]
+            label = f"列表 {list_id}"
+            log.info(f"{label}: 读取列表时间线")
+            # 列表成员不固定：整个列表使用列表自身的已见推文ID提前停止，单独监控的成员同时使用各自的已见推文ID
+            collector = scraper.MultiAuthorCollector(label, since_ids, since_id=since_ids.get(unit))
+            tweets = _scrape_timeline(page, label, LIST_URL.format(list_id=list_id), collector,
+                                      timeline_parser.LIST_OPERATIONS, unit_deadline)
+            if tweets is None:
+                log.warning(f"{label}: 列表页面加载失败，顺延到下一轮")
+                continue
+            yield unit, tweets
+        else:
+            label = f"搜索批量 {index - len(list_sources) + 1}/{len(units) - len(list_sources)}"
+            log.info(f"{label}: 检查 {len(sources)} 个用户: {', '.join(sources)}")
+            collector = scraper.MultiAuthorCollector(label, since_ids, sources)
+            tweets = _scrape_timeline(page, label, SEARCH_URL.format(query=quote(unit)), collector,
+                                      timeline_parser.SEARCH_OPERATIONS, unit_deadline)
+            if tweets is None:
+                log.warning(f"{label}: 搜索页面加载失败，{len(sources)} 个用户顺延到下一轮")
+                continue
+            yield from collector.results_by_author().items()
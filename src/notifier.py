@@ -1,5 +1,7 @@
+import asyncio
 import requests
 from . import config, logger
+from .models import Tweet
 
 # 获取日志器
 log = logger.get_logger('notifier')
@@ -59,6 +61,24 @@ def send_telegram_notification(message: str, username: str = None) -> bool:
             log.error(f"错误详情: {e.response.text}")
         return False
 
+async def send_telegram_notification_async(message: str, username: str = None) -> bool:
+    """
+    send_telegram_notification 的异步版本，供异步引擎使用
+
+    在线程池中发送请求，发送通知时不阻塞事件循环，抓取可以同时进行
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, send_telegram_notification, message, username)
+
+def format_tweet_message(tweet: Tweet) -> str:
+    """生成推文通知的消息内容"""
+    return (
+        f"<b>新动态!</b>\n\n"
+        f"<b>用户:</b> {tweet.user}\n"
+        f"<b>内容:</b>\n{tweet.text[:1000]}\n\n" # 限制长度避免消息过长
+        f"<a href='{tweet.url}'>查看原文</a>"
+    )
+
 def _strip_html(text: str) -> str:
     """移除HTML标签"""
     import re
@@ -0,0 +1,99 @@
+"""
+抓取结果处理模块
+同步引擎（main.py）和异步引擎（async_engine.py）共用的新推文判断、通知和保存逻辑
+"""
+import time
+from typing import List
+from . import config, database, notifier, logger
+from .models import Tweet
+
+# 获取日志器
+log = logger.get_logger('processing')
+
+# 上次清理已见推文存储的时间（time.monotonic() 时间），启动后的第一轮即清理一次
+_last_compaction = None
+
+
+def check_user_tweets(user: str, found_tweets: List[Tweet], seen_store,
+                      seen_marks: database.SeenMarks) -> List[Tweet]:
+    """
+    检查一个用户抓取到的推文，找出新推文并加入已见推文存储，同时更新该用户的已见水位线
+
+    Args:
+        seen_store: database.open_seen_store() 打开的已见推文存储
+        seen_marks: database.open_seen_marks() 打开的已见水位线
+
+    Returns:
+        list: 新推文列表
+    """
+    new_tweets = []
+
+    log.info(f"用户 {user}: 检查 {len(found_tweets)} 条推文是否为新推文...")
+
+    for tweet in found_tweets:
+        # 先按水位线判断，只有可能是新推文时才查询已见推文存储
+        is_new = not seen_marks.is_seen(user, tweet) and tweet.id_str not in seen_store
+
+        # 记录推文发现
+        logger.log_tweet_found(
+            tweet.user,
+            tweet.id_str,
+            tweet.timestamp,
+            tweet.text,
+            is_new
+        )
+
+        if is_new:
+            new_tweets.append(tweet)
+            seen_store.add(tweet.id_str, tweet.user)
+
+    logger.log_scraping_result(user, len(found_tweets), len(new_tweets))
+
+    # 抓取失败时返回的空列表没有完整标记，没有推文也不会改变水位线
+    seen_marks.update(user, found_tweets, getattr(found_tweets, 'complete', True))
+    return new_tweets
+
+
+def notify_new_tweets(new_tweets: List[Tweet]):
+    """按时间从新到旧依次发送新推文通知"""
+    # 按发布时间排序，最新的推文先通知
+    new_tweets.sort(key=lambda tweet: tweet.created_at, reverse=True)
+    log.info(f"准备发送 {len(new_tweets)} 条新推文通知（按时间从新到旧）")
+
+    # 显示将要发送通知的推文列表
+    log.info("新推文通知列表:")
+    for i, tweet in enumerate(new_tweets):
+        log.info(f"  {i+1}. 用户: {tweet.user}, ID: {tweet.id}, 时间: {tweet.timestamp}")
+
+    for tweet in new_tweets:
+        success = notifier.send_telegram_notification(notifier.format_tweet_message(tweet), tweet.user)
+        logger.log_notification_sent(tweet.user, tweet.id_str, success)
+        time.sleep(1) # 短暂延迟，避免触发Telegram的速率限制
+
+
+def save_round_state(seen_store, seen_marks: database.SeenMarks, new_tweets_count: int):
+    """保存本轮更新后的已见推文和每个用户的已见水位线，并关闭已见推文存储"""
+    if new_tweets_count:
+        seen_store.save()
+        log.info(f"处理完成，共发现 {new_tweets_count} 条新推文，数据库已更新")
+    compact_seen_store(seen_store)
+    seen_store.close()
+
+    # 在已见推文保存之后再更新，避免通知中途出错时提前停止导致漏推
+    seen_marks.save()
+
+
+def compact_seen_store(seen_store):
+    """按保留策略清理已见推文存储，每 SEEN_COMPACTION_INTERVAL_SECONDS 秒最多一次"""
+    global _last_compaction
+    min_tweet_id, max_per_user = database.get_retention_policy()
+    if min_tweet_id is None and not max_per_user:
+        return
+    now = time.monotonic()
+    if _last_compaction is not None and now - _last_compaction < config.SEEN_COMPACTION_INTERVAL_SECONDS:
+        return
+    _last_compaction = now
+
+    removed = seen_store.compact(min_tweet_id, max_per_user)
+    seen_store.save()
+    log.info(f"已见推文清理完成: 删除 {removed} 条, 剩余 {len(seen_store)} 条 (耗时 {time.monotonic() - now:.2f} 秒)")
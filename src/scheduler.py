@@ -0,0 +1,318 @@
+"""
+轮询调度模块
+
+RoundClock: 固定间隔的轮次时钟
+    按 time.monotonic() 在固定的时间点开始每一轮，轮次耗时不会推迟之后的轮次；
+    每轮有截止时间，到期未检查的用户顺延到下一轮。
+
+UserScheduler: 按用户自适应的调度器
+    根据每个用户最近推文的发布时间估计发推频率，为每个用户单独计算检查间隔：
+    发推频繁的用户检查得更勤，长期不发推的用户逐渐降低检查频率，把浏览器时间留给活跃用户。
+
+    间隔计算:
+        发推频率 = 最近 N 条推文数 / (当前时间 - 其中最早一条的时间)
+        检查间隔 = 平均发推间隔 × SCHEDULE_GAP_FRACTION，限制在最小和最大间隔之间，再加上随机抖动
+    长时间不发推时，分母随时间增长，估计的频率会自然下降。
+
+    通过 ADAPTIVE_SCHEDULING=true 启用。
+"""
+import asyncio
+import heapq
+import random
+import statistics
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from . import config, database, logger
+from .models import Tweet
+
+# 获取日志器
+log = logger.get_logger('scheduler')
+
+# 每个用户保留的最近推文时间数量
+MAX_TIMESTAMPS_PER_USER = 20
+
+# 估计发推频率时的最短观察时长（秒），避免刚发了一条推文时估计值过高
+MIN_OBSERVATION_SECONDS = 3600
+
+# 轮次统计保留的最近轮数
+ROUND_STATS_HISTORY = 100
+
+
+class RoundClock:
+    """
+    固定间隔的轮次时钟
+
+    第 n 轮计划在 起始时间 + n × 间隔 开始。上一轮超时结束时立即开始下一轮；
+    超时超过一整个间隔时跳过错过的时间点，而不是连续补跑。
+
+    用法:
+        clock = RoundClock(interval)
+        while True:
+            deadline = clock.wait_for_next_tick()  # 异步引擎中使用 await clock.wait_for_next_tick_async()
+            ...在 deadline 之前完成本轮...
+            clock.end_round(rolled_over_count)
+    """
+
+    def __init__(self, interval: float, deadline_fraction: Optional[float] = None):
+        """
+        Args:
+            interval: 轮次间隔（秒）
+            deadline_fraction: 每轮的时间预算占间隔的比例，默认使用 config.ROUND_DEADLINE_FRACTION
+        """
+        self.interval = float(interval)
+        self.deadline_fraction = config.ROUND_DEADLINE_FRACTION if deadline_fraction is None else deadline_fraction
+        self.start_time = None
+        self.tick_index = 0
+        self.tick_time = 0.0
+
+        self.rounds = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+        self.rolled_over_users = 0
+        self.lags = deque(maxlen=ROUND_STATS_HISTORY)
+        self.durations = deque(maxlen=ROUND_STATS_HISTORY)
+
+    @property
+    def deadline(self) -> float:
+        """本轮的截止时间（time.monotonic() 时间）"""
+        return self.tick_time + self.interval * self.deadline_fraction
+
+    @property
+    def next_tick_time(self) -> float:
+        return self.tick_time + self.interval
+
+    def wait_for_next_tick(self) -> float:
+        """
+        等待下一个计划时间点
+
+        Returns:
+            float: 本轮的截止时间（time.monotonic() 时间）
+        """
+        delay = self._advance_tick()
+        if delay > 0:
+            time.sleep(delay)
+        return self._begin_round()
+
+    async def wait_for_next_tick_async(self) -> float:
+        """wait_for_next_tick 的异步版本，等待期间不阻塞事件循环"""
+        delay = self._advance_tick()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._begin_round()
+
+    def _advance_tick(self) -> float:
+        """前进到下一个计划时间点，返回还需要等待的秒数"""
+        now = time.monotonic()
+        if self.start_time is None:
+            self.start_time = now
+            self.tick_index = 0
+            return 0.0
+
+        self.tick_index += 1
+        next_tick = self.start_time + self.tick_index * self.interval
+        # 已经过了计划时间点对应的截止时间时，这一轮没有时间预算（所有用户都会顺延），
+        # 跳到截止时间还没有过去的计划时间点
+        budget = self.interval * self.deadline_fraction
+        if now >= next_tick + budget:
+            missed = int((now - next_tick - budget) // self.interval) + 1
+            self.skipped_ticks += missed
+            self.tick_index += missed
+            log.warning(f"上一轮超时，跳过 {missed} 个计划时间点")
+            next_tick = self.start_time + self.tick_index * self.interval
+        return next_tick - now
+
+    def _begin_round(self) -> float:
+        self.tick_time = self.start_time + self.tick_index * self.interval
+        lag = max(0.0, time.monotonic() - self.tick_time)
+        self.lags.append(lag)
+        if lag >= 1:
+            log.info(f"本轮比计划时间晚 {lag:.1f} 秒开始")
+        return self.deadline
+
+    def seconds_until_next_tick(self) -> float:
+        return max(0.0, self.next_tick_time - time.monotonic())
+
+    def end_round(self, rolled_over: int = 0):
+        """记录本轮的耗时、超时和顺延情况，并输出统计"""
+        now = time.monotonic()
+        duration = now - self.tick_time
+        self.rounds += 1
+        self.rolled_over_users += rolled_over
+        self.durations.append(duration)
+
+        if now > self.next_tick_time:
+            self.overruns += 1
+            log.warning(f"本轮耗时 {duration:.1f} 秒，超出间隔 {now - self.next_tick_time:.1f} 秒")
+        elif now > self.deadline:
+            log.warning(f"本轮耗时 {duration:.1f} 秒，超出时间预算 {now - self.deadline:.1f} 秒")
+        if rolled_over:
+            log.warning(f"{rolled_over} 个用户未在截止时间前检查，顺延到下一轮")
+
+        log.info(f"轮次统计: 共 {self.rounds} 轮, 超时 {self.overruns} 轮, 跳过 {self.skipped_ticks} 个时间点, "
+                 f"顺延 {self.rolled_over_users} 人次, 平均耗时 {statistics.mean(self.durations):.1f} 秒, "
+                 f"开始滞后 平均 {statistics.mean(self.lags):.2f} 秒 / 最大 {max(self.lags):.2f} 秒")
+
+
+class UserScheduler:
+    """
+    用户检查调度器，使用优先队列按到期时间排列用户
+
+    用法:
+        scheduler = UserScheduler(users)
+        due_users = scheduler.pop_due()
+        ...抓取...
+        scheduler.observe(user, tweets)  # 每个用户抓取后调用，同时安排下一次检查
+        scheduler.save()
+    """
+
+    def __init__(self, users: List[str], min_interval: Optional[int] = None, max_interval: Optional[int] = None,
+                 jitter: Optional[float] = None, state_path: Optional[str] = None):
+        """
+        Args:
+            users: 要调度的用户列表
+            min_interval: 最小检查间隔（秒），默认使用 config.SCHEDULE_MIN_INTERVAL_SECONDS
+            max_interval: 最大检查间隔（秒），默认使用 config.SCHEDULE_MAX_INTERVAL_SECONDS
+            jitter: 随机抖动比例（0.1 表示 ±10%），默认使用 config.SCHEDULE_JITTER
+            state_path: 调度状态文件路径，默认使用 config.SCHEDULE_STATE_FILE_PATH
+        """
+        self.min_interval = config.SCHEDULE_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.max_interval = config.SCHEDULE_MAX_INTERVAL_SECONDS if max_interval is None else max_interval
+        self.jitter = config.SCHEDULE_JITTER if jitter is None else jitter
+        self.state_path = state_path or config.SCHEDULE_STATE_FILE_PATH
+
+        state = database.load_schedule_state(self.state_path)
+        self.users = list(users)
+        self.timestamps = {user: list(state.get(user, {}).get('timestamps', [])) for user in self.users}
+        self.intervals = {user: state.get(user, {}).get('interval') for user in self.users}
+        # 新加入的用户立即到期
+        self.next_due = {user: state.get(user, {}).get('next_due', 0.0) for user in self.users}
+
+        # 优先队列中的条目是 (到期时间, 序号, 用户名)；重新安排时放入新条目，旧条目在取出时跳过
+        self._heap = []
+        self._counter = 0
+        for user in self.users:
+            self._push(user, self.next_due[user])
+
+    def _push(self, user: str, due: float):
+        self.next_due[user] = due
+        heapq.heappush(self._heap, (due, self._counter, user))
+        self._counter += 1
+
+    def _peek(self) -> Optional[float]:
+        """丢弃过期的旧条目，返回最早的到期时间"""
+        while self._heap:
+            due, _, user = self._heap[0]
+            if self.next_due.get(user) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """
+        取出所有已到期的用户，按到期时间从早到晚排列
+
+        取出的用户在调用 observe 或 reschedule 之前不会再次到期
+        """
+        now = time.time() if now is None else now
+        due_users = []
+        while True:
+            due = self._peek()
+            if due is None or due > now:
+                break
+            _, _, user = heapq.heappop(self._heap)
+            self.next_due[user] = float('inf')
+            due_users.append(user)
+        return due_users
+
+    def seconds_until_next_due(self, now: Optional[float] = None) -> float:
+        """距离下一个用户到期的秒数，已有用户到期时返回 0"""
+        now = time.time() if now is None else now
+        due = self._peek()
+        if due is None:
+            return float(self.max_interval)
+        return max(0.0, due - now)
+
+    def estimate_rate(self, user: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        估计用户的发推频率
+
+        Returns:
+            float: 每小时发推数；没有任何推文记录时返回 None
+        """
+        timestamps = self.timestamps.get(user)
+        if not timestamps:
+            return None
+        now = time.time() if now is None else now
+        # 推文时间是去掉时区信息的 UTC 时间
+        oldest = datetime.fromisoformat(timestamps[0]).replace(tzinfo=timezone.utc).timestamp()
+        observed_seconds = max(now - oldest, MIN_OBSERVATION_SECONDS)
+        return len(timestamps) / observed_seconds * 3600
+
+    def compute_interval(self, user: str, now: Optional[float] = None) -> float:
+        """根据发推频率计算下一次检查的基础间隔（秒，不含抖动）"""
+        rate = self.estimate_rate(user, now)
+        if rate is None:
+            # 抓取范围内没有任何推文，按最长间隔检查
+            return float(self.max_interval)
+        mean_gap_seconds = 3600 / rate
+        interval = mean_gap_seconds * config.SCHEDULE_GAP_FRACTION
+        return float(min(max(interval, self.min_interval), self.max_interval))
+
+    def observe(self, user: str, tweets: List[Tweet], now: Optional[float] = None):
+        """
+        记录一次抓取结果，更新该用户的推文时间并安排下一次检查
+
+        置顶推文和转推的时间不代表用户的发推时间，不参与估计
+        """
+        now = time.time() if now is None else now
+        known = set(self.timestamps.setdefault(user, []))
+        for tweet in tweets:
+            if not tweet.is_pinned and not tweet.is_retweet:
+                known.add(tweet.timestamp)
+        self.timestamps[user] = sorted(known)[-MAX_TIMESTAMPS_PER_USER:]
+        self.reschedule(user, now)
+
+    def reschedule(self, user: str, now: Optional[float] = None):
+        """按当前的频率估计为用户安排下一次检查"""
+        now = time.time() if now is None else now
+        interval = self.compute_interval(user, now)
+        self.intervals[user] = interval
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._push(user, now + interval)
+
+    def mark_due(self, user: str, now: Optional[float] = None):
+        """让用户立即到期（用于上一轮未来得及检查的用户）"""
+        self._push(user, time.time() if now is None else now)
+
+    def get_next_due_times(self) -> Dict[str, datetime]:
+        """返回每个用户的下一次检查时间，已取出尚未重新安排的用户不包含在内"""
+        return {user: datetime.fromtimestamp(due) for user, due in self.next_due.items()
+                if due != float('inf')}
+
+    def log_schedule(self, now: Optional[float] = None):
+        """输出所有用户的发推频率估计和下一次检查时间"""
+        now = time.time() if now is None else now
+        log.info("用户检查计划:")
+        for user in sorted(self.users, key=lambda u: self.next_due[u]):
+            rate = self.estimate_rate(user, now)
+            rate_text = f"{rate:.2f} 条/小时" if rate is not None else "无推文"
+            due = self.next_due[user]
+            due_text = datetime.fromtimestamp(due).strftime('%H:%M:%S') if due != float('inf') else "进行中"
+            interval = self.intervals.get(user)
+            interval_text = f"{interval:.0f} 秒" if interval else "-"
+            log.info(f"  {user}: 频率 {rate_text}, 间隔 {interval_text}, 下次检查 {due_text}")
+
+    def save(self):
+        """保存调度状态，重启后保持各用户的频率估计和检查时间"""
+        state = {}
+        for user in self.users:
+            due = self.next_due[user]
+            state[user] = {
+                'timestamps': self.timestamps.get(user, []),
+                'interval': self.intervals.get(user),
+                'next_due': due if due != float('inf') else 0.0,
+            }
+        database.save_schedule_state(self.state_path, state)
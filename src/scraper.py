@@ -1,195 +1,1250 @@
+import json
+import re
+import statistics
 import time
+import weakref
+from collections import deque
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
-from playwright.sync_api import Page, TimeoutError
-from . import config, logger
+from typing import List, Dict, Optional, Tuple
+from playwright.sync_api import Page, Response, TimeoutError
+from . import config, database, logger, snowflake, timeline_parser
+from .models import Tweet, TweetList
 
 # 获取日志器
 log = logger.get_logger('scraper')
 
+# X的前端选择器非常不稳定，这是目前常用的一个。如果失效，需要手动更新。
+TWEET_SELECTOR = "article[data-testid='tweet']"
+
+# 每个用户最多滚动加载的次数
+MAX_SCROLL_ATTEMPTS = 5
+
+# 推文顶部提示文字（socialContext）中表示置顶和转推的关键字
+PINNED_MARKERS = ['Pinned', '置顶']
+RETWEET_MARKERS = ['reposted', 'Retweeted', '转帖', '转推']
+
+# 在页面中一次性提取所有推文元素的信息，避免逐个元素调用定位器带来的多次通信
+EXTRACT_TWEETS_SCRIPT = """
+({selector, pinnedMarkers, retweetMarkers}) => {
+    const hasMarker = (text, markers) => markers.some(marker => text.includes(marker));
+
+    return Array.from(document.querySelectorAll(selector)).map(article => {
+        // 与定位器路径保持一致：取第一个不是 analytics 的 /status/ 链接
+        const link = Array.from(article.querySelectorAll("a[href*='/status/']"))
+            .find(a => !a.textContent.includes('analytics'));
+        if (!link) {
+            return null;
+        }
+        const href = link.getAttribute('href');
+        const timeElement = article.querySelector('time');
+        const textElement = article.querySelector("[data-testid='tweetText']");
+        const socialContext = article.querySelector("[data-testid='socialContext']");
+        const contextText = socialContext ? socialContext.textContent : '';
+
+        return {
+            id: href.split('/status/').pop().split('?')[0].split('/')[0],
+            href: href,
+            datetime: timeElement ? timeElement.getAttribute('datetime') : null,
+            text: textElement ? textElement.innerText : '',
+            isPinned: hasMarker(contextText, pinnedMarkers),
+            isRetweet: hasMarker(contextText, retweetMarkers),
+        };
+    }).filter(item => item !== null);
+}
+"""
+
+# 流式提取：在页面中用 MutationObserver 监听新出现的推文元素，每出现一条就提取信息（与 EXTRACT_TWEETS_SCRIPT 的方式一致），
+# 通过 page.expose_binding 注入的函数推送给 Python。时间线是虚拟列表，滚出屏幕的元素会被移除，
+# 流式提取在元素出现时就记录下来，不会漏掉，也不需要反复遍历整个页面。
+# 同一个元素只推送一次（元素被复用显示其他推文时再次推送）；应用内切换时带 data-xm-stale 标记的旧推文不推送。
+# 同一个文档中只安装一次，可以作为初始化脚本在每个新文档中运行，也可以直接在已加载的页面上执行
+STREAM_OBSERVER_SCRIPT = """
+({selector, pinnedMarkers, retweetMarkers, binding}) => {
+    if (window.__xmStreamInstalled) {
+        return false;
+    }
+    window.__xmStreamInstalled = true;
+    const hasMarker = (text, markers) => markers.some(marker => text.includes(marker));
+    const emitted = new WeakMap();
+    let pending = [];
+    let flushTimer = null;
+
+    const flush = () => {
+        flushTimer = null;
+        if (typeof window[binding] !== 'function') {
+            // 绑定尚未注入到新文档时稍后重试
+            flushTimer = setTimeout(flush, 50);
+            return;
+        }
+        const items = pending;
+        pending = [];
+        window[binding](items);
+    };
+
+    const visit = article => {
+        if (article.hasAttribute('data-xm-stale')) {
+            return;
+        }
+        const link = Array.from(article.querySelectorAll("a[href*='/status/']"))
+            .find(a => !a.textContent.includes('analytics'));
+        if (!link) {
+            return;
+        }
+        const href = link.getAttribute('href');
+        const id = href.split('/status/').pop().split('?')[0].split('/')[0];
+        if (emitted.get(article) === id) {
+            return;
+        }
+        emitted.set(article, id);
+
+        const timeElement = article.querySelector('time');
+        const textElement = article.querySelector("[data-testid='tweetText']");
+        const socialContext = article.querySelector("[data-testid='socialContext']");
+        const contextText = socialContext ? socialContext.textContent : '';
+        pending.push({
+            id: id,
+            href: href,
+            datetime: timeElement ? timeElement.getAttribute('datetime') : null,
+            text: textElement ? textElement.innerText : '',
+            isPinned: hasMarker(contextText, pinnedMarkers),
+            isRetweet: hasMarker(contextText, retweetMarkers),
+        });
+        if (!flushTimer) {
+            flushTimer = setTimeout(flush, 0);
+        }
+    };
+
+    const scan = node => {
+        if (node.nodeType !== Node.ELEMENT_NODE) {
+            return;
+        }
+        const article = node.closest(selector);
+        if (article) {
+            visit(article);
+        } else {
+            node.querySelectorAll(selector).forEach(visit);
+        }
+    };
+
+    new MutationObserver(mutations => {
+        mutations.forEach(mutation => mutation.addedNodes.forEach(scan));
+    }).observe(document, {childList: true, subtree: true});
+    document.querySelectorAll(selector).forEach(visit);
+    return true;
+}
+"""
+
+# 流式提取时注入到页面中的函数名
+STREAM_BINDING_NAME = '__xmTweetStream'
+
+# 滚动到页面底部，并等待新内容加载的信号：
+#   articles: 推文元素数量增加
+#   mutation: MutationObserver 发现新插入的推文元素（时间线是虚拟列表，元素总数不一定增加）
+#   network: 时间线接口请求完成
+# 收到信号后再等待 settleMs 让同一批内容渲染完成；超过 timeoutMs 仍无信号则返回 timeout
+SCROLL_AND_WAIT_SCRIPT = """
+({selector, operations, timeoutMs, settleMs}) => new Promise(resolve => {
+    const start = performance.now();
+    const previousCount = document.querySelectorAll(selector).length;
+    const timelinePattern = new RegExp('/i/api/graphql/[^/]+/(' + operations.join('|') + ')');
+    let signal = null;
+    let timer = null;
+
+    const finish = () => {
+        mutationObserver.disconnect();
+        performanceObserver.disconnect();
+        resolve({
+            signal: signal || 'timeout',
+            elapsed: Math.round(performance.now() - start),
+            count: document.querySelectorAll(selector).length,
+        });
+    };
+    const onSignal = (name) => {
+        if (signal) {
+            return;
+        }
+        signal = name;
+        clearTimeout(timer);
+        timer = setTimeout(finish, settleMs);
+    };
+
+    const mutationObserver = new MutationObserver(mutations => {
+        if (document.querySelectorAll(selector).length > previousCount) {
+            onSignal('articles');
+            return;
+        }
+        const addedTweet = mutations.some(mutation => Array.from(mutation.addedNodes).some(node =>
+            node.nodeType === Node.ELEMENT_NODE && (node.matches(selector) || node.querySelector(selector))));
+        if (addedTweet) {
+            onSignal('mutation');
+        }
+    });
+    mutationObserver.observe(document.body, {childList: true, subtree: true});
+
+    const performanceObserver = new PerformanceObserver(list => {
+        if (list.getEntries().some(entry => timelinePattern.test(entry.name))) {
+            onSignal('network');
+        }
+    });
+    performanceObserver.observe({type: 'resource'});
+
+    timer = setTimeout(finish, timeoutMs);
+    window.scrollTo(0, document.body.scrollHeight);
+})
+"""
+
+# 页面状态：推文已出现，或无法抓取的失败状态
+PAGE_STATE_TWEETS = 'tweets'
+PAGE_STATE_DESCRIPTIONS = {
+    'login': "需要登录，登录状态可能已失效，请重新运行 'python initialize_profile.py'",
+    'suspended': "账号已被冻结",
+    'not_found': "账号不存在",
+    'protected': "账号的推文受保护",
+    'rate_limited': "触发了访问频率限制",
+    'empty': "时间线为空",
+    'unchanged': "发帖总数与上次完整抓取时相同，没有新推文",
+}
+
+# 主栏中表示各失败状态的文字（按顺序匹配）
+PAGE_STATE_MARKERS = {
+    'suspended': ['Account suspended', '账号已被冻结', '账号已冻结'],
+    'not_found': ["This account doesn’t exist", "This account doesn't exist", '此账号不存在', '这个账号不存在'],
+    'protected': ['posts are protected', '帖子受保护', '推文受保护'],
+    'rate_limited': ['Something went wrong. Try reloading', 'Rate limit exceeded', '出错了。请尝试重新加载'],
+}
+
+# 读取页面当前状态（不等待）：推文已出现返回 'tweets'，识别出失败状态返回状态名，仍在加载返回 null。
+# 应用内切换用户时，上一个用户的推文带有 data-xm-stale 标记，在它们被移除之前视为仍在加载
+DETECT_PAGE_STATE_SCRIPT = """
+({selector, markers}) => {
+    if (document.querySelector('[data-xm-stale]')) {
+        return null;
+    }
+    if (document.querySelector(selector)) {
+        return 'tweets';
+    }
+    const path = location.pathname;
+    if (path.startsWith('/login') || path.startsWith('/i/flow/login')
+            || document.querySelector("input[autocomplete='username']")) {
+        return 'login';
+    }
+    const primaryColumn = document.querySelector("[data-testid='primaryColumn']");
+    const text = primaryColumn ? primaryColumn.innerText : '';
+    for (const [state, stateMarkers] of Object.entries(markers)) {
+        if (stateMarkers.some(marker => text.includes(marker))) {
+            return state;
+        }
+    }
+    if (document.querySelector("[data-testid='emptyState']")) {
+        return 'empty';
+    }
+    return null;
+}
+"""
+
+# 在已加载的 X 应用内切换到另一个用户主页：通过 history.pushState 修改地址，再触发 popstate 让应用的路由渲染新页面。
+# 页面上没有推文（上一次访问失败或不在 X 应用中）时不切换，返回 false
+SPA_NAVIGATE_SCRIPT = """
+({path, selector}) => {
+    if (!/(^|\\.)x\\.com$/.test(location.hostname) || !document.querySelector(selector)) {
+        return false;
+    }
+    document.querySelectorAll(selector).forEach(article => article.setAttribute('data-xm-stale', ''));
+    window.scrollTo(0, 0);
+    history.pushState({}, '', path);
+    window.dispatchEvent(new PopStateEvent('popstate', {state: history.state}));
+    return true;
+}
+"""
+
+# 应用内切换连续失败多少次后停止尝试，改为始终完整加载页面
+SPA_MAX_CONSECUTIVE_FAILURES = 3
+
+def parse_iso_datetime(datetime_attr: str) -> datetime:
+    """解析time元素datetime属性中的ISO格式时间，返回datetime对象（时区无关）"""
+    dt = datetime.fromisoformat(datetime_attr.replace('Z', '+00:00'))
+    return dt.replace(tzinfo=None)  # 移除时区信息，统一使用时区无关的datetime
+
+
 def parse_tweet_time(time_element) -> datetime:
-    """解析推文时间元素，返回datetime对象（时区无关）"""
+    """解析推文时间元素，返回datetime对象（时区无关的 UTC 时间）"""
     try:
         # 尝试获取time元素的datetime属性
         datetime_attr = time_element.get_attribute('datetime')
         if datetime_attr:
-            # 解析ISO格式时间并转换为本地时间（时区无关）
-            dt = datetime.fromisoformat(datetime_attr.replace('Z', '+00:00'))
-            return dt.replace(tzinfo=None)  # 移除时区信息，统一使用时区无关的datetime
+            return parse_iso_datetime(datetime_attr)
         
         # 如果没有datetime属性，尝试解析文本内容
-        time_text = time_element.inner_text().strip()
-        now = datetime.now()  # 时区无关的当前时间
-        
-        if '分钟' in time_text or 'min' in time_text or 'm' in time_text:
-            minutes = int(''.join(filter(str.isdigit, time_text)))
-            return now - timedelta(minutes=minutes)
-        elif '小时' in time_text or 'hour' in time_text or 'h' in time_text:
-            hours = int(''.join(filter(str.isdigit, time_text)))
-            return now - timedelta(hours=hours)
-        elif '天' in time_text or 'day' in time_text or 'd' in time_text:
-            days = int(''.join(filter(str.isdigit, time_text)))
-            return now - timedelta(days=days)
-        else:
-            # 如果无法解析，返回当前时间
-            return now
+        return parse_relative_time_text(time_element.inner_text())
             
     except Exception as e:
         log.warning(f"解析推文时间失败: {e}")
-        return datetime.now()
+        return datetime.utcnow()
+
+
+# 相对时间文字: 数字后紧跟单位，例如 "5m"、"3 小时"、"2d"
+_RELATIVE_TIME_PATTERN = re.compile(r'^(\d+)\s*(分钟|mins?|m|小时|hours?|h|天|days?|d)(?![a-z])', re.IGNORECASE)
+_RELATIVE_TIME_UNITS = {
+    '分钟': 'minutes', 'min': 'minutes', 'm': 'minutes',
+    '小时': 'hours', 'hour': 'hours', 'h': 'hours',
+    '天': 'days', 'day': 'days', 'd': 'days',
+}
+
+
+def parse_relative_time_text(time_text: str) -> datetime:
+    """解析推文时间元素中的相对时间文字（如 "5分钟"、"3h"），返回datetime对象（时区无关的 UTC 时间）"""
+    now = datetime.utcnow()
+    match = _RELATIVE_TIME_PATTERN.match(time_text.strip())
+    if not match:
+        # 如果无法解析（例如 "Mar 5" 这样的日期），返回当前时间
+        return now
+    unit = _RELATIVE_TIME_UNITS[match.group(2).lower().rstrip('s')]
+    return now - timedelta(**{unit: int(match.group(1))})
+
+
+def get_tweet_time(tweet_id: str) -> Optional[datetime]:
+    """
+    从推文ID计算发布时间（时区无关的 UTC 时间），不需要读取页面上的时间元素。
+    2010 年 11 月之前的推文ID不包含时间，返回 None，由调用方改用页面上的时间
+    """
+    return snowflake.snowflake_to_datetime(tweet_id)
+
+
+class _AdaptiveWaitTimeout:
+    """根据最近几次滚动等待的实际耗时自适应调整等待超时，内容加载快时不必每次等满上限"""
+
+    def __init__(self, min_ms: int, max_ms: int, history_size: int = 20):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.history = deque(maxlen=history_size)
+
+    @property
+    def timeout_ms(self) -> int:
+        if not self.history:
+            return self.max_ms
+        # 取最近耗时中位数的 3 倍，限制在 [min_ms, max_ms] 范围内
+        return int(min(self.max_ms, max(self.min_ms, statistics.median(self.history) * 3)))
+
+    def record(self, elapsed_ms: int):
+        self.history.append(elapsed_ms)
+
+
+_scroll_wait_timeout = _AdaptiveWaitTimeout(config.SCROLL_WAIT_MIN_MS, config.SCROLL_WAIT_MAX_MS)
+
+
+class _NavigationStats:
+    """统计每个用户的导航耗时（从发起导航到推文出现），区分应用内切换和完整页面加载"""
+
+    MODE_NAMES = {'spa': '应用内切换', 'full': '完整加载'}
+
+    def __init__(self):
+        self.timings = {mode: [] for mode in self.MODE_NAMES}
+        self.spa_fallbacks = 0
+        self.consecutive_spa_failures = 0
+
+    @property
+    def spa_enabled(self) -> bool:
+        return config.SPA_NAVIGATION and self.consecutive_spa_failures < SPA_MAX_CONSECUTIVE_FAILURES
+
+    def record(self, mode: str, seconds: float):
+        self.timings[mode].append(seconds)
+        if mode == 'spa':
+            self.consecutive_spa_failures = 0
+
+    def record_spa_failure(self):
+        self.spa_fallbacks += 1
+        self.consecutive_spa_failures += 1
+        if self.consecutive_spa_failures == SPA_MAX_CONSECUTIVE_FAILURES:
+            log.warning(f"应用内切换连续失败 {SPA_MAX_CONSECUTIVE_FAILURES} 次，之后改为完整加载页面")
+
+    def log_summary(self):
+        for mode, timings in self.timings.items():
+            if timings:
+                log.info(f"导航耗时（{self.MODE_NAMES[mode]}）: {len(timings)} 次, "
+                         f"平均 {statistics.mean(timings):.2f} 秒, 中位 {statistics.median(timings):.2f} 秒, "
+                         f"最长 {max(timings):.2f} 秒")
+        if self.spa_fallbacks:
+            log.info(f"应用内切换失败并改为完整加载: {self.spa_fallbacks} 次")
+
+    def reset(self):
+        self.timings = {mode: [] for mode in self.MODE_NAMES}
+        self.spa_fallbacks = 0
+
+
+_navigation_stats = _NavigationStats()
+
+
+def record_navigation(mode: str, seconds: float, username: str):
+    """记录一次导航耗时，mode 为 'spa'（应用内切换）或 'full'（完整加载）"""
+    _navigation_stats.record(mode, seconds)
+    log.info(f"用户 {username}: 导航耗时 {seconds:.2f} 秒（{_NavigationStats.MODE_NAMES[mode]}）")
+
+
+def log_navigation_summary():
+    """输出并重置本轮的导航耗时统计"""
+    _navigation_stats.log_summary()
+    _navigation_stats.reset()
+
+
+class _ChangeProbe:
+    """
+    主页变化预检：比较用户的发帖总数与上次完整抓取时记录的值，没有变化时跳过推文提取
+
+    发帖总数来自打开主页时页面请求的用户资料接口（UserByScreenName），这个请求在时间线之前完成，
+    命中时不需要等待时间线渲染，也不需要提取和滚动加载。
+    同时删除一条并发布一条推文时总数不变，这条推文要到总数再次变化时才会被发现
+    """
+
+    def __init__(self):
+        self.fingerprints = None  # 首次使用时从文件加载
+        self.updated = {}
+        self.reset()
+
+    def _load(self) -> Dict[str, int]:
+        if self.fingerprints is None:
+            self.fingerprints = database.load_probe_state(config.PROBE_STATE_FILE_PATH)
+        return self.fingerprints
+
+    def check(self, username: str, fingerprint: int) -> bool:
+        """比较预检结果，返回主页是否没有变化"""
+        if self._load().get(username) == fingerprint:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def record_unresolved(self, fingerprint_found: bool):
+        """推文先于用户资料出现（已完整抓取）或没有取得发帖总数时调用"""
+        if fingerprint_found:
+            self.misses += 1
+        else:
+            self.unknown += 1
+
+    def update(self, username: str, fingerprint: int):
+        """记录完整抓取时的发帖总数"""
+        self._load()[username] = fingerprint
+        self.updated[username] = fingerprint
+
+    def save(self):
+        if not self.updated:
+            return
+        # 保存前重新读取，只覆盖本进程更新过的用户
+        fingerprints = database.load_probe_state(config.PROBE_STATE_FILE_PATH)
+        fingerprints.update(self.updated)
+        database.save_probe_state(config.PROBE_STATE_FILE_PATH, fingerprints)
+        self.fingerprints = fingerprints
+        self.updated = {}
+
+    def log_summary(self):
+        total = self.hits + self.misses + self.unknown
+        if total:
+            log.info(f"主页变化预检: 未变化跳过 {self.hits} 个, 有变化 {self.misses} 个, 无法预检 {self.unknown} 个, "
+                     f"命中率 {self.hits / total:.0%}")
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.unknown = 0
+
+
+_change_probe = _ChangeProbe()
+
+
+def log_probe_summary():
+    """输出并重置本轮的主页变化预检统计"""
+    _change_probe.log_summary()
+    _change_probe.reset()
+
+
+def save_probe_state():
+    """
+    保存本进程完整抓取过的用户的发帖总数
+
+    必须在本轮的已见推文保存之后调用，否则中途出错时下一轮会因为总数未变而跳过尚未通知的推文
+    """
+    _change_probe.save()
+
+
+class _TweetStream:
+    """接收页面通过绑定推送的推文元素信息（每个页面一个）"""
+
+    def __init__(self):
+        self.items = []
+
+    def on_items(self, source, items: List[Dict]):
+        self.items.extend(items)
+
+    def drain(self) -> List[Dict]:
+        """取出已收到的推文元素信息"""
+        items, self.items = self.items, []
+        return items
+
+
+_tweet_streams = weakref.WeakKeyDictionary()
+
+
+def get_stream_observer_args() -> Dict:
+    return {
+        'selector': TWEET_SELECTOR,
+        'pinnedMarkers': PINNED_MARKERS,
+        'retweetMarkers': RETWEET_MARKERS,
+        'binding': STREAM_BINDING_NAME,
+    }
+
+
+def get_tweet_stream(page: Page) -> _TweetStream:
+    """
+    为页面开启流式提取：注入绑定函数，并让之后加载的每个文档都安装推文监听。
+    同一个页面只注入一次，之后返回同一个 _TweetStream
+    """
+    stream = _tweet_streams.get(page)
+    if stream is None:
+        stream = _TweetStream()
+        page.expose_binding(STREAM_BINDING_NAME, stream.on_items)
+        page.add_init_script(f"({STREAM_OBSERVER_SCRIPT})({json.dumps(get_stream_observer_args())})")
+        _tweet_streams[page] = stream
+    return stream
+
+
+def scroll_and_wait_for_tweets(page: Page, tweet_selector: str,
+                               operations=timeline_parser.TIMELINE_OPERATIONS) -> Dict:
+    """
+    滚动到页面底部，等待新推文加载完成
+
+    Returns:
+        dict: {signal, elapsed, count}，signal 为触发返回的信号（articles/mutation/network/timeout），
+              elapsed 为实际等待的毫秒数，count 为等待结束时页面上的推文元素数量
+    """
+    wait_args = get_scroll_wait_args(tweet_selector, operations)
+    result = page.evaluate(SCROLL_AND_WAIT_SCRIPT, wait_args)
+    record_scroll_wait(result, wait_args['timeoutMs'])
+    return result
+
+
+def get_scroll_wait_args(tweet_selector: str, operations=timeline_parser.TIMELINE_OPERATIONS) -> Dict:
+    """生成 SCROLL_AND_WAIT_SCRIPT 的参数（使用当前的自适应超时）"""
+    return {
+        'selector': tweet_selector,
+        'operations': list(operations),
+        'timeoutMs': _scroll_wait_timeout.timeout_ms,
+        'settleMs': config.SCROLL_WAIT_SETTLE_MS,
+    }
+
+
+def record_scroll_wait(result: Dict, timeout_ms: int):
+    """记录一次滚动等待的结果，用于调整后续的等待超时"""
+    # 超时说明没有新内容（例如已到底部），不计入耗时统计，避免拉低超时上限
+    if result['signal'] != 'timeout':
+        _scroll_wait_timeout.record(result['elapsed'])
+    log.debug(f"滚动等待 {result['elapsed']} 毫秒 (信号: {result['signal']}, 超时上限: {timeout_ms} 毫秒, 推文元素: {result['count']} 个)")
 
 
 def is_tweet_within_date_range(tweet_time: datetime, days_limit: int) -> bool:
     """检查推文是否在指定的日期范围内"""
-    cutoff_date = datetime.now() - timedelta(days=days_limit)  # 时区无关的当前时间
+    cutoff_date = datetime.utcnow() - timedelta(days=days_limit)  # 推文时间是时区无关的 UTC 时间
     return tweet_time >= cutoff_date
 
 
-def scrape_user_tweets(page: Page, username: str) -> List[Dict]:
+class TweetCollector:
+    """汇总一次抓取过程中各批次找到的推文，负责去重、日期范围检查、停止判断和排序"""
+
+    def __init__(self, username: str, since_id: Optional[str] = None):
+        self.username = username
+        self.since_id = int(since_id) if since_id else None  # 上次已见的最新推文ID
+        self.tweets = []  # 存储所有找到的推文
+        self.processed_ids = set()  # 避免重复处理
+        self.reached_date_limit = False  # 是否遇到了超出日期范围的普通推文（置顶推文和转推不按时间排列）
+        self.reached_since_id = False
+        self.consecutive_no_new_tweets = 0
+
+    def is_processed(self, tweet_id: str) -> bool:
+        return tweet_id in self.processed_ids
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.tweets) >= config.MAX_TWEETS_PER_USER
+
+    def add(self, tweet_id: str, tweet_time: datetime, text: str, url: str,
+            is_pinned: bool = False, is_retweet: bool = False, is_reply: bool = False,
+            media: Tuple[Dict, ...] = ()) -> bool:
+        """
+        添加一条推文
+
+        Args:
+            tweet_time: 时区无关的 UTC 发布时间
+
+        Returns:
+            bool: 是否为本次抓取中首次出现、在日期范围内且比上次已见推文更新的推文
+        """
+        if tweet_id in self.processed_ids:
+            return False
+        self.processed_ids.add(tweet_id)
+
+        # 推文ID按时间递增，遇到不晚于上次已见推文的普通推文，说明之后的内容都已见过。
+        # 置顶推文和转推（显示的是原推文ID）不按时间排列，不能作为判断依据
+        if self.since_id is not None and not is_pinned and not is_retweet and int(tweet_id) <= self.since_id:
+            self.reached_since_id = True
+            return False
+
+        # 检查推文是否在日期范围内
+        if not is_tweet_within_date_range(tweet_time, config.DAYS_TO_SCRAPE):
+            if not is_pinned and not is_retweet:
+                self.reached_date_limit = True
+            return False
+
+        self.tweets.append(Tweet(
+            id=int(tweet_id),
+            user=self.username,
+            text=text,
+            url=url,
+            created_at=tweet_time.replace(tzinfo=timezone.utc),
+            is_pinned=is_pinned,
+            is_retweet=is_retweet,
+            is_reply=is_reply,
+            media=media,
+        ))
+
+        log.debug(f"找到推文 ID: {tweet_id}, 时间: {tweet_time}, 内容: {text[:50]}...")
+        return True
+
+    def get_stop_reason(self, new_tweets_in_this_batch: int) -> Optional[str]:
+        """
+        每批提取之后调用，判断是否应停止滚动加载
+
+        Returns:
+            str: 停止原因，需要继续加载时返回 None
+        """
+        # 已经到达上次看到的最新推文，之后的内容都已见过
+        if self.reached_since_id:
+            return f"已到达上次已见的推文 {self.since_id}"
+
+        # 如果找到了超出日期范围的普通推文，说明已经加载了足够的历史内容；
+        # 置顶推文和转推不按时间排列，旧的置顶推文出现在最前面，不能作为停止依据
+        if self.reached_date_limit and len(self.tweets) > 0:
+            return "已找到超出日期范围的推文"
+
+        # 如果连续几轮都没有找到新推文，可能已经到底了
+        if new_tweets_in_this_batch == 0:
+            self.consecutive_no_new_tweets += 1
+            if self.consecutive_no_new_tweets >= 2:
+                return f"连续 {self.consecutive_no_new_tweets} 轮未找到新推文"
+        else:
+            self.consecutive_no_new_tweets = 0
+
+        if self.is_full:
+            return f"已获取 {len(self.tweets)} 条推文"
+        return None
+
+    @property
+    def is_complete(self) -> bool:
+        """是否已检查到上次已见的推文或日期范围的边界（两者之间没有遗漏的推文）"""
+        return self.reached_since_id or self.reached_date_limit
+
+    def results(self) -> List[Tweet]:
+        """按时间从新到旧排序（推文ID按发布时间递增，直接按ID排序）"""
+        self.tweets.sort(key=lambda tweet: tweet.id, reverse=True)
+        return self.tweets
+
+
+class MultiAuthorCollector(TweetCollector):
     """
-    抓取指定用户主页上最近几天的推文，按时间从新到旧排序。
-    返回一个包含推文信息的字典列表。
+    汇总多人时间线（搜索结果、列表）中的推文，按作者分别交给各自的 TweetCollector
+
+    与 TweetCollector 的接口相同，可以直接用于 TimelineScrape；
+    每个作者的去重、日期范围和已见推文判断与单独抓取该用户时一致。
+    作者从推文地址 https://x.com/<作者>/status/<ID> 中识别；
+    转推的地址是原推文作者，无法识别转推者，因此不收集转推
     """
-    url = f"https://x.com/{username}"
-    log.info(f"访问用户页面: {url}")
-    all_tweets = []  # 存储所有找到的推文
-    processed_tweet_ids = set()  # 避免重复处理
-    scroll_attempts = 0
-    max_scroll_attempts = 5
 
-    try:
-        page.goto(url, wait_until="networkidle", timeout=60000)
-        log.debug(f"成功访问页面: {url}")
-    except TimeoutError:
-        log.warning(f"访问 {url} 超时，但仍尝试继续处理")
-    except Exception as e:
-        log.error(f"访问 {url} 时发生严重错误: {e}")
-        return []
+    def __init__(self, label: str, since_ids: Dict[str, Optional[str]], authors: Optional[List[str]] = None,
+                 since_id: Optional[str] = None):
+        """
+        Args:
+            label: 日志中显示的名称
+            since_ids: 每个作者上次已见的最新推文ID
+            authors: 只收集这些作者的推文；为 None 时收集所有作者（遇到新作者时创建收集器）
+            since_id: 整个时间线上次已见的最新推文ID（用于列表等作者不固定的时间线）
+        """
+        super().__init__(label, since_id)
+        self.since_ids = since_ids
+        self.accept_any_author = authors is None
+        self.collectors = {}
+        for author in authors or []:
+            self.collectors[author.lower()] = TweetCollector(author, since_ids.get(author))
 
-    try:
-        # X的前端选择器非常不稳定，这是目前常用的一个。如果失效，需要手动更新。
-        tweet_selector = "article[data-testid='tweet']"
-        page.wait_for_selector(tweet_selector, timeout=30000)
-        log.debug(f"找到推文选择器: {tweet_selector}")
-        
-        # 滚动加载更多推文，直到获得足够的推文或达到日期限制
-        consecutive_no_new_tweets = 0
-        
-        while len(all_tweets) < config.MAX_TWEETS_PER_USER and scroll_attempts < max_scroll_attempts:
-            # 获取当前页面上所有推文元素
-            tweet_elements = page.locator(tweet_selector).all()
-            log.debug(f"用户 {username}: 页面上找到 {len(tweet_elements)} 个推文元素")
+        # 时间线按时间从新到旧排列：所有作者都有已见推文ID时，遇到不晚于其中最小ID的推文即可停止
+        if authors and all(since_ids.get(author) for author in authors):
+            self.since_id = min(int(since_ids[author]) for author in authors)
 
-            found_old_tweets = False
-            new_tweets_in_this_batch = 0
-            
-            for i, tweet_element in enumerate(tweet_elements):
-                try:
-                    # 寻找包含 /status/ 的链接来确定推文ID和URL
-                    tweet_link_element = tweet_element.locator("a[href*='/status/']").filter(has_not_text="analytics").first
-                    tweet_url = tweet_link_element.get_attribute('href')
-                    
-                    if not tweet_url or "/status/" not in tweet_url:
-                        continue
-                    
-                    tweet_id = tweet_url.split('/status/')[-1].split('?')[0]
-                    
-                    # 检查是否已经处理过这条推文
-                    if tweet_id in processed_tweet_ids:
-                        continue
-                    
-                    processed_tweet_ids.add(tweet_id)
-                    
-                    # 尝试获取推文时间
-                    time_element = tweet_element.locator("time").first
-                    if time_element:
-                        tweet_time = parse_tweet_time(time_element)
-                        
-                        # 检查推文是否在日期范围内
-                        if not is_tweet_within_date_range(tweet_time, config.DAYS_TO_SCRAPE):
-                            found_old_tweets = True
-                            continue
-                    else:
-                        # 如果找不到时间元素，假设是最近的推文
-                        tweet_time = datetime.now()
-                    
-                    # 提取推文文本
-                    text_element = tweet_element.locator("[data-testid='tweetText']").first
-                    tweet_text = text_element.inner_text() if text_element else ""
-
-                    tweet_data = {
-                        "id": tweet_id,
-                        "text": tweet_text,
-                        "url": f"https://x.com{tweet_url}",
-                        "user": username,
-                        "timestamp": tweet_time.isoformat(),
-                        "datetime": tweet_time  # 用于排序
-                    }
-                    
-                    all_tweets.append(tweet_data)
-                    new_tweets_in_this_batch += 1
-                    
-                    log.debug(f"找到推文 ID: {tweet_id}, 时间: {tweet_time}, 内容: {tweet_text[:50]}...")
-                        
-                except Exception as e:
-                    # 忽略解析单个推文时的错误，继续处理下一个
-                    log.warning(f"解析推文 {i+1} 时出错: {e}")
-                    continue
-            
-            log.debug(f"用户 {username}: 本轮找到 {new_tweets_in_this_batch} 条新推文，总计 {len(all_tweets)} 条")
-            
-            # 如果找到了超出日期范围的推文，说明已经加载了足够的历史内容
-            if found_old_tweets and len(all_tweets) > 0:
-                log.info(f"用户 {username}: 已找到超出日期范围的推文，停止加载更多内容")
-                break
-            
-            # 如果连续几轮都没有找到新推文，可能已经到底了
-            if new_tweets_in_this_batch == 0:
-                consecutive_no_new_tweets += 1
-                if consecutive_no_new_tweets >= 2:
-                    log.info(f"用户 {username}: 连续 {consecutive_no_new_tweets} 轮未找到新推文，停止滚动")
-                    break
-            else:
-                consecutive_no_new_tweets = 0
-            
-            # 如果还需要更多推文，尝试滚动加载
-            if len(all_tweets) < config.MAX_TWEETS_PER_USER:
-                log.debug(f"用户 {username}: 尝试滚动加载更多推文...")
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(3)  # 增加等待时间，确保内容加载
-                scroll_attempts += 1
-            else:
-                break
-
-    except TimeoutError:
-        log.warning(f"在用户 {username} 页面上等待推文元素超时，页面可能未加载或没有推文")
-    except Exception as e:
-        log.error(f"在抓取用户 {username} 页面时发生错误: {e}")
-        page.screenshot(path=f"error_screenshot_{username}.png")
-        log.info(f"已保存错误截图: error_screenshot_{username}.png")
+    @property
+    def is_full(self) -> bool:
+        # 作者不固定时无法判断是否已收集足够，由日期范围和已见推文ID决定何时停止
+        if self.accept_any_author:
+            return False
+        return bool(self.collectors) and all(collector.is_full for collector in self.collectors.values())
+
+    def add(self, tweet_id: str, tweet_time: datetime, text: str, url: str,
+            is_pinned: bool = False, is_retweet: bool = False, is_reply: bool = False,
+            media: Tuple[Dict, ...] = ()) -> bool:
+        if tweet_id in self.processed_ids:
+            return False
+        self.processed_ids.add(tweet_id)
+
+        if self.since_id is not None and not is_pinned and not is_retweet and int(tweet_id) <= self.since_id:
+            self.reached_since_id = True
+        if is_retweet:
+            return False
+
+        author = url.split('x.com/')[-1].split('/')[0]
+        collector = self.collectors.get(author.lower())
+        if collector is None:
+            if not self.accept_any_author:
+                return False
+            collector = self.collectors[author.lower()] = TweetCollector(author, self.since_ids.get(author))
+
+        added = collector.add(tweet_id, tweet_time, text, url, is_pinned, is_retweet, is_reply, media)
+        if collector.reached_date_limit:
+            self.reached_date_limit = True
+        if added:
+            self.tweets.append(collector.tweets[-1])
+        return added
+
+    def results_by_author(self) -> Dict[str, TweetList]:
+        """
+        返回每个作者按时间从新到旧排序的推文列表
+
+        整个时间线到达所有作者中最早的已见推文时，每个作者都已检查到各自的已见推文
+        """
+        return {collector.username: TweetList(collector.results(), collector.is_complete or self.reached_since_id)
+                for collector in self.collectors.values()}
+
+
+def finish_scrape(collector: TweetCollector, scroll_attempts: int = 0, scroll_wait_ms: int = 0) -> TweetList:
+    """整理抓取结果并输出摘要日志，返回按时间从新到旧排序的推文列表（带有是否完整检查的标记）"""
+    username = collector.username
 
     # 按时间排序，最新的在前面
-    all_tweets.sort(key=lambda x: x['datetime'], reverse=True)
-    
-    # 移除用于排序的datetime字段，只保留需要的数据
-    result_tweets = []
-    for tweet in all_tweets:
-        result_tweet = {k: v for k, v in tweet.items() if k != 'datetime'}
-        result_tweets.append(result_tweet)
-    
+    result_tweets = collector.results()
+
     log.info(f"用户 {username}: 成功获取 {len(result_tweets)} 条推文")
-    
+    if scroll_attempts:
+        log.info(f"用户 {username}: 滚动 {scroll_attempts} 次，共等待 {scroll_wait_ms} 毫秒")
+
     # 显示推文摘要（只在DEBUG级别显示详细列表）
     if result_tweets:
         if log.isEnabledFor(10):  # DEBUG级别
             log.debug(f"用户 {username}: 获取到的推文列表:")
             for i, tweet in enumerate(result_tweets):
-                log.debug(f"  {i+1}. ID: {tweet['id']}, 时间: {tweet['timestamp']}")
-        
-        log.info(f"用户 {username}: 最新推文时间: {result_tweets[0]['timestamp']}")
+                log.debug(f"  {i+1}. ID: {tweet.id}, 时间: {tweet.timestamp}")
+
+        log.info(f"用户 {username}: 最新推文时间: {result_tweets[0].timestamp}")
         if len(result_tweets) > 1:
-            log.info(f"用户 {username}: 最旧推文时间: {result_tweets[-1]['timestamp']}")
+            log.info(f"用户 {username}: 最旧推文时间: {result_tweets[-1].timestamp}")
+    elif collector.reached_since_id:
+        log.info(f"用户 {username}: 没有比上次更新的推文")
     else:
         log.warning(f"用户 {username}: 未获取到任何推文")
-    
-    return result_tweets
\ No newline at end of file
+
+    return TweetList(result_tweets, collector.is_complete)
+
+
+def _parse_social_context(tweet_element) -> Tuple[bool, bool]:
+    """读取推文顶部的提示文字，返回 (是否置顶, 是否转推)"""
+    social_context = tweet_element.locator("[data-testid='socialContext']")
+    if social_context.count() == 0:
+        return False, False
+    context_text = social_context.first.inner_text()
+    return (any(marker in context_text for marker in PINNED_MARKERS),
+            any(marker in context_text for marker in RETWEET_MARKERS))
+
+
+def _collect_from_dom(page: Page, tweet_selector: str, collector: TweetCollector) -> int:
+    """逐个解析页面上的推文元素，返回本轮新增的推文数量"""
+    tweet_elements = page.locator(tweet_selector).all()
+    log.debug(f"用户 {collector.username}: 页面上找到 {len(tweet_elements)} 个推文元素")
+
+    new_tweets_in_this_batch = 0
+    for i, tweet_element in enumerate(tweet_elements):
+        try:
+            # 寻找包含 /status/ 的链接来确定推文ID和URL
+            tweet_link_element = tweet_element.locator("a[href*='/status/']").filter(has_not_text="analytics").first
+            tweet_url = tweet_link_element.get_attribute('href')
+
+            if not tweet_url or "/status/" not in tweet_url:
+                continue
+
+            tweet_id = tweet_url.split('/status/')[-1].split('?')[0]
+
+            # 检查是否已经处理过这条推文
+            if collector.is_processed(tweet_id):
+                continue
+
+            # 推文时间从推文ID计算，只有旧格式的ID才读取时间元素
+            tweet_time = get_tweet_time(tweet_id) or parse_tweet_time(tweet_element.locator("time").first)
+
+            # 提取推文文本
+            text_element = tweet_element.locator("[data-testid='tweetText']").first
+            tweet_text = text_element.inner_text() if text_element else ""
+
+            # 置顶/转推标记既用于提前停止，也用于已见水位线判断（置顶和转推的ID不按水位线跳过），需要始终读取
+            is_pinned, is_retweet = _parse_social_context(tweet_element)
+
+            if collector.add(tweet_id, tweet_time, tweet_text, f"https://x.com{tweet_url}", is_pinned, is_retweet):
+                new_tweets_in_this_batch += 1
+
+        except Exception as e:
+            # 忽略解析单个推文时的错误，继续处理下一个
+            log.warning(f"解析推文 {i+1} 时出错: {e}")
+            continue
+
+    return new_tweets_in_this_batch
+
+
+def extract_tweets_batch(page: Page, tweet_selector: str) -> List[Dict]:
+    """
+    通过一次 page.evaluate 调用提取页面上所有推文元素的信息
+
+    Returns:
+        list: 每个元素为 {id, href, datetime, text, isPinned, isRetweet}
+    """
+    return page.evaluate(EXTRACT_TWEETS_SCRIPT, get_extract_tweets_args(tweet_selector))
+
+
+def get_extract_tweets_args(tweet_selector: str) -> Dict:
+    """生成 EXTRACT_TWEETS_SCRIPT 的参数（同步和异步引擎共用）"""
+    return {
+        'selector': tweet_selector,
+        'pinnedMarkers': PINNED_MARKERS,
+        'retweetMarkers': RETWEET_MARKERS,
+    }
+
+
+def get_page_state_args() -> Dict:
+    """生成 DETECT_PAGE_STATE_SCRIPT 的参数（同步和异步引擎共用）"""
+    return {
+        'selector': TWEET_SELECTOR,
+        'markers': PAGE_STATE_MARKERS,
+    }
+
+
+def get_timeout_ms(deadline: Optional[float], default_ms: int) -> int:
+    """按截止时间（time.monotonic() 时间）收紧超时，至少保留 1 秒"""
+    if deadline is None:
+        return default_ms
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    return max(1000, min(default_ms, remaining_ms))
+
+
+def _collect_from_batch(page: Page, tweet_selector: str, collector: TweetCollector) -> int:
+    """批量提取页面上的推文元素，返回本轮新增的推文数量"""
+    items = extract_tweets_batch(page, tweet_selector)
+    log.debug(f"用户 {collector.username}: 页面上找到 {len(items)} 个推文元素")
+    return add_batch_items(items, collector)
+
+
+def _collect_from_stream(stream: _TweetStream, collector: TweetCollector) -> int:
+    """处理页面推送来的推文元素信息，返回本轮新增的推文数量"""
+    items = stream.drain()
+    log.debug(f"用户 {collector.username}: 页面推送了 {len(items)} 个推文元素")
+    return add_batch_items(items, collector)
+
+
+def add_batch_items(items: List[Dict], collector: TweetCollector) -> int:
+    """将批量提取的推文元素信息加入收集器，返回新增的推文数量"""
+    new_tweets_in_this_batch = 0
+    for item in items:
+        if collector.is_processed(item['id']):
+            continue
+        tweet_time = get_tweet_time(item['id'])
+        if tweet_time is None:
+            try:
+                # 如果找不到时间，假设是最近的推文
+                tweet_time = parse_iso_datetime(item['datetime']) if item['datetime'] else datetime.utcnow()
+            except ValueError as e:
+                log.warning(f"解析推文时间失败: {e}")
+                tweet_time = datetime.utcnow()
+
+        if collector.add(item['id'], tweet_time, item['text'], f"https://x.com{item['href']}",
+                         item['isPinned'], item['isRetweet']):
+            new_tweets_in_this_batch += 1
+
+    return new_tweets_in_this_batch
+
+
+def _collect_from_responses(responses: List[Response], collector: TweetCollector) -> int:
+    """解析已捕获的时间线接口响应，返回本轮新增的推文数量"""
+    new_tweets_in_this_batch = 0
+    while responses:
+        response = responses.pop(0)
+        try:
+            payload = response.json()
+        except Exception as e:
+            log.warning(f"用户 {collector.username}: 读取时间线接口响应失败: {e}")
+            continue
+
+        new_tweets_in_this_batch += add_timeline_payload(payload, collector)
+
+    return new_tweets_in_this_batch
+
+
+def add_timeline_payload(payload: Dict, collector: TweetCollector) -> int:
+    """解析一个时间线接口响应并加入收集器，返回新增的推文数量"""
+    parsed_tweets = timeline_parser.parse_timeline_response(payload)
+    log.debug(f"用户 {collector.username}: 时间线接口响应中解析到 {len(parsed_tweets)} 条推文")
+
+    new_tweets = 0
+    for tweet in parsed_tweets:
+        added = collector.add(
+            tweet['id'],
+            get_tweet_time(tweet['id']) or tweet['created_at'],
+            tweet['text'],
+            tweet['url'],
+            tweet['is_pinned'],
+            tweet['is_retweet'],
+            tweet['is_reply'],
+            tuple(tweet['media']),
+        )
+        if added:
+            new_tweets += 1
+    return new_tweets
+
+
+def check_page_state(username: str, state: Optional[str]) -> bool:
+    """
+    检查页面状态，识别出失败状态时输出原因
+
+    Returns:
+        bool: 是否可以继续提取（推文已出现或状态未知）
+    """
+    if state is None or state == PAGE_STATE_TWEETS:
+        return True
+
+    message = f"用户 {username}: {PAGE_STATE_DESCRIPTIONS.get(state, state)}，跳过抓取"
+    if state == 'login':
+        log.error(message)
+    elif state == 'rate_limited':
+        log.warning(message)
+    else:
+        log.info(message)
+    return False
+
+
+class TimelineScrape:
+    """
+    一次用户主页抓取
+
+    分为导航（navigate）和提取（collect）两个阶段：单独抓取时依次调用即可；
+    多标签页并发抓取时，可以先在多个标签页上发起导航，再按页面就绪的顺序逐个提取。
+
+    根据 config.SCRAPE_MODE 选择提取方式:
+        dom: 逐个解析页面上的推文元素
+        batch: 通过一次 page.evaluate 调用批量提取页面上的推文元素
+        stream: 页面中的 MutationObserver 在推文元素出现时推送给 Python
+        graphql: 直接解析页面请求的时间线接口（UserTweets）返回的 JSON
+    """
+
+    def __init__(self, page: Page, username: str, since_id: Optional[str] = None,
+                 deadline: Optional[float] = None, url: Optional[str] = None,
+                 collector: Optional[TweetCollector] = None, operations=timeline_parser.TIMELINE_OPERATIONS):
+        """
+        Args:
+            deadline: 本次抓取的截止时间（time.monotonic() 时间），到期后不再滚动加载，
+                      导航和等待推文的超时也不会超过它
+            url: 要抓取的时间线页面，默认为用户主页（其他页面不使用应用内切换）
+            collector: 推文收集器，默认为该用户的 TweetCollector
+            operations: 页面请求的时间线接口操作名，用于 graphql 模式和滚动等待
+        """
+        self.page = page
+        self.username = username
+        self.since_id = since_id
+        self.deadline = deadline
+        self.url = url or f"https://x.com/{username}"
+        self.is_profile = url is None
+        self.collector = collector or TweetCollector(username, since_id)
+        self.operations = operations
+        self.use_graphql = config.SCRAPE_MODE == "graphql"
+        self.stream = None
+        self.use_probe = config.CHANGE_PROBE and self.is_profile
+        self.captured_responses = []
+        self.profile_responses = []
+        self.fingerprint = None
+        self._probe_checked = False
+        self.scroll_attempts = 0
+        self.scroll_wait_ms = 0
+        self.page_state = None
+        self._listening = False
+
+    def _timeout_ms(self, default_ms: int) -> int:
+        return get_timeout_ms(self.deadline, default_ms)
+
+    def is_over_budget(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _on_response(self, response: Response):
+        operation = timeline_parser.get_operation_name(response.url)
+        if self.use_graphql and operation in self.operations:
+            self.captured_responses.append(response)
+        elif self.use_probe and operation in timeline_parser.PROFILE_OPERATIONS:
+            self.profile_responses.append(response)
+
+    def _read_fingerprint(self) -> Optional[int]:
+        """从已收到的用户资料接口响应中读取发帖总数"""
+        while self.fingerprint is None and self.profile_responses:
+            response = self.profile_responses.pop(0)
+            try:
+                self.fingerprint = timeline_parser.parse_profile_post_count(response.json())
+            except Exception as e:
+                log.debug(f"用户 {self.username}: 解析用户资料响应失败: {e}")
+        return self.fingerprint
+
+    def _check_probe(self) -> Optional[str]:
+        """
+        主页变化预检
+
+        Returns:
+            str: 发帖总数没有变化时返回 'unchanged'；有变化或尚未收到用户资料时返回 None
+        """
+        if not self.use_probe or self._probe_checked:
+            return None
+        fingerprint = self._read_fingerprint()
+        if fingerprint is None:
+            return None
+        self._probe_checked = True
+        return 'unchanged' if _change_probe.check(self.username, fingerprint) else None
+
+    def close(self):
+        """移除响应监听"""
+        if self._listening:
+            self.page.remove_listener("response", self._on_response)
+            self._listening = False
+
+    def navigate(self, wait_until: Optional[str] = None) -> bool:
+        """
+        访问用户主页
+
+        Args:
+            wait_until: 导航等待的事件；并发抓取时使用 "commit"，导航发起后立即返回。
+                        默认按 config.NAVIGATION_MODE:
+                            ready: 等到 domcontentloaded，再等待推文出现或识别出失败状态
+                            networkidle: 等到网络空闲
+                        使用默认值且启用 config.SPA_NAVIGATION 时，先尝试在已加载的应用内切换用户
+
+        Returns:
+            bool: 是否可以继续提取
+        """
+        use_default_wait = wait_until is None
+        wait_for_ready = use_default_wait and config.NAVIGATION_MODE == "ready"
+        if wait_until is None:
+            wait_until = "domcontentloaded" if wait_for_ready else "networkidle"
+
+        log.info(f"访问用户页面: {self.url}")
+        # 时间线和用户资料接口请求在页面加载时发出，必须在导航前开始监听
+        if (self.use_graphql or self.use_probe) and not self._listening:
+            self.page.on("response", self._on_response)
+            self._listening = True
+
+        if config.SCRAPE_MODE == "stream":
+            self._start_stream()
+
+        navigation_start = time.perf_counter()
+        if use_default_wait and self.is_profile and _navigation_stats.spa_enabled:
+            state = self._navigate_in_app()
+            if state:
+                record_navigation('spa', time.perf_counter() - navigation_start, self.username)
+                return self.handle_page_state(state)
+            navigation_start = time.perf_counter()
+
+        try:
+            self.page.goto(self.url, wait_until=wait_until, timeout=self._timeout_ms(60000))
+            log.debug(f"成功访问页面: {self.url} (耗时 {time.perf_counter() - navigation_start:.2f} 秒)")
+        except TimeoutError:
+            log.warning(f"访问 {self.url} 超时，但仍尝试继续处理")
+        except Exception as e:
+            log.error(f"访问 {self.url} 时发生严重错误: {e}")
+            self.close()
+            return False
+
+        state = None
+        if wait_for_ready:
+            state = self.wait_until_ready()
+            if state is None:
+                log.warning(f"用户 {self.username}: 等待推文出现超时，但仍尝试继续处理")
+        else:
+            state = self._check_probe()
+        if use_default_wait:
+            record_navigation('full', time.perf_counter() - navigation_start, self.username)
+        return self.handle_page_state(state)
+
+    def _start_stream(self):
+        """开启流式提取，丢弃上一次抓取遗留的推文元素"""
+        self.stream = get_tweet_stream(self.page)
+        self.stream.drain()
+        try:
+            # 当前文档在开启流式提取之前已加载时（如应用内切换的起始页面），在当前文档中安装监听
+            self.page.evaluate(STREAM_OBSERVER_SCRIPT, get_stream_observer_args())
+        except Exception as e:
+            log.debug(f"在当前页面安装推文监听失败: {e}")
+
+    def _navigate_in_app(self) -> Optional[str]:
+        """
+        在已加载的 X 应用内切换到用户主页，只请求新用户的时间线数据
+
+        Returns:
+            str: 切换成功后的页面状态；无法切换或切换失败时返回 None（调用方改为完整加载页面）
+        """
+        path = f"/{self.username}"
+        try:
+            if not self.page.evaluate(SPA_NAVIGATE_SCRIPT, {'path': path, 'selector': TWEET_SELECTOR}):
+                return None
+            state = self.wait_until_ready(config.SPA_NAVIGATION_TIMEOUT_SECONDS * 1000)
+            if state and self.page.evaluate("() => location.pathname").lower() == path.lower():
+                return state
+            log.warning(f"用户 {self.username}: 应用内切换未完成，改为完整加载页面")
+        except Exception as e:
+            log.warning(f"用户 {self.username}: 应用内切换失败，改为完整加载页面: {e}")
+        _navigation_stats.record_spa_failure()
+        return None
+
+    def get_page_state(self) -> Optional[str]:
+        """
+        读取页面当前状态（不等待，立即返回）
+
+        Returns:
+            str: PAGE_STATE_TWEETS 或 PAGE_STATE_DESCRIPTIONS 中的失败状态；仍在加载时返回 None。
+                 graphql 模式下收到时间线接口响应即视为就绪；
+                 启用主页变化预检时，发帖总数没有变化返回 'unchanged'
+        """
+        probe_state = self._check_probe()
+        if probe_state:
+            return probe_state
+        state = self.page.evaluate(DETECT_PAGE_STATE_SCRIPT, get_page_state_args())
+        if state is None and self.captured_responses:
+            return PAGE_STATE_TWEETS
+        return state
+
+    def handle_page_state(self, state: Optional[str]) -> bool:
+        """
+        记录页面状态，识别出失败状态时输出原因并结束本次抓取
+
+        Returns:
+            bool: 是否可以继续提取
+        """
+        self.page_state = state
+        if check_page_state(self.username, state):
+            return True
+        self.close()
+        return False
+
+    def wait_until_ready(self, timeout_ms: int = 30000) -> Optional[str]:
+        """
+        等待推文出现或识别出失败状态
+
+        Returns:
+            str: 页面状态；超时仍在加载时返回 None
+        """
+        deadline = time.monotonic() + self._timeout_ms(timeout_ms) / 1000
+        while True:
+            state = self.get_page_state()
+            if state or time.monotonic() >= deadline:
+                return state
+            # 短暂等待（期间 Playwright 会继续分发响应事件）
+            self.page.wait_for_timeout(100)
+
+    def wait_for_tweets(self, timeout_ms: int = 30000):
+        """
+        等待可以提取的推文：graphql 模式等待时间线接口响应，不依赖页面结构；其他模式等待推文元素出现
+
+        Raises:
+            TimeoutError: 超时仍没有可以提取的推文
+        """
+        if not self.use_graphql:
+            self.page.wait_for_selector(TWEET_SELECTOR, timeout=self._timeout_ms(timeout_ms))
+            log.debug(f"找到推文选择器: {TWEET_SELECTOR}")
+            return
+        deadline = time.monotonic() + self._timeout_ms(timeout_ms) / 1000
+        while not self.captured_responses:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待时间线接口响应超时 ({timeout_ms} 毫秒)")
+            # 短暂等待（期间 Playwright 会继续分发响应事件）
+            self.page.wait_for_timeout(100)
+        log.debug(f"用户 {self.username}: 已收到时间线接口响应")
+
+    def _collect_batch(self) -> int:
+        if self.use_graphql:
+            return _collect_from_responses(self.captured_responses, self.collector)
+        elif config.SCRAPE_MODE == "batch":
+            return _collect_from_batch(self.page, TWEET_SELECTOR, self.collector)
+        elif self.stream is not None:
+            return _collect_from_stream(self.stream, self.collector)
+        return _collect_from_dom(self.page, TWEET_SELECTOR, self.collector)
+
+    def collect(self) -> List[Tweet]:
+        """
+        等待推文加载并提取，按需滚动加载更多推文
+
+        Returns:
+            list: 按时间从新到旧排序的推文列表
+        """
+        username = self.username
+        collector = self.collector
+        completed = False
+
+        try:
+            self.wait_for_tweets()
+
+            # 滚动加载更多推文，直到获得足够的推文或达到日期限制
+            while self.scroll_attempts < MAX_SCROLL_ATTEMPTS:
+                new_tweets_in_this_batch = self._collect_batch()
+                log.debug(f"用户 {username}: 本轮找到 {new_tweets_in_this_batch} 条新推文，总计 {len(collector.tweets)} 条")
+
+                stop_reason = collector.get_stop_reason(new_tweets_in_this_batch)
+                if stop_reason:
+                    log.info(f"用户 {username}: {stop_reason}，停止加载更多内容")
+                    break
+
+                if self.is_over_budget():
+                    log.warning(f"用户 {username}: 已用完本次抓取的时间预算，停止加载更多内容")
+                    break
+
+                # 还需要更多推文，尝试滚动加载
+                log.debug(f"用户 {username}: 尝试滚动加载更多推文...")
+                wait_result = scroll_and_wait_for_tweets(self.page, TWEET_SELECTOR, self.operations)
+                self.scroll_wait_ms += wait_result['elapsed']
+                self.scroll_attempts += 1
+            completed = True
+
+        except TimeoutError:
+            log.warning(f"在用户 {username} 页面上等待推文超时，页面可能未加载或没有推文")
+        except Exception as e:
+            log.error(f"在抓取用户 {username} 页面时发生错误: {e}")
+            self.page.screenshot(path=f"error_screenshot_{username}.png")
+            log.info(f"已保存错误截图: error_screenshot_{username}.png")
+        finally:
+            self.close()
+
+        if self.use_probe:
+            fingerprint = self._read_fingerprint()
+            if not self._probe_checked:
+                _change_probe.record_unresolved(fingerprint is not None)
+            # 只在完整抓取成功后记录，下一轮才能据此跳过
+            if completed and fingerprint is not None:
+                _change_probe.update(username, fingerprint)
+
+        return finish_scrape(collector, self.scroll_attempts, self.scroll_wait_ms)
+
+
+def scrape_user_tweets(page: Page, username: str, since_id: Optional[str] = None,
+                       deadline: Optional[float] = None) -> List[Tweet]:
+    """
+    抓取指定用户主页上最近几天的推文，按时间从新到旧排序。
+    返回 Tweet 列表。
+
+    如果提供了 since_id（该用户上次已见的最新推文ID），遇到不晚于它的非置顶、非转推推文时
+    立即停止滚动，只返回比它更新的推文。
+
+    如果提供了 deadline（time.monotonic() 时间），到期后停止滚动，返回已经找到的推文。
+    """
+    scrape = TimelineScrape(page, username, since_id, deadline)
+    if not scrape.navigate():
+        return []
+    return scrape.collect()
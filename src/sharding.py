@@ -0,0 +1,286 @@
+"""
+多进程分片抓取模块
+一个浏览器配置文件同一时间只能被一个持久化上下文打开，单进程是抓取能力的上限。
+这里把已登录的配置文件克隆成多份，启动多个工作进程，每个进程使用自己的配置文件抓取一部分用户。
+
+分工:
+    工作进程: 启动浏览器，只负责抓取分配到的用户，把结果发回协调进程
+    协调进程: 持有已见推文数据库和通知器，负责判断新推文、发送通知和保存状态
+
+用户按一致性哈希（rendezvous hashing）分配到工作进程，
+调整进程数量时只有少数用户需要换到其他进程。
+
+通过 SHARD_COUNT 大于 1 启用。
+"""
+import hashlib
+import multiprocessing
+import os
+import queue
+import shutil
+import time
+from typing import List, Optional, Tuple
+from . import config, database, logger, browser_config, browser_manager, processing, main, scraper, scheduler
+
+# 获取日志器
+log = logger.get_logger('sharding')
+
+# 克隆配置文件时跳过的文件：锁文件属于正在运行的浏览器，缓存目录体积大且可以重新生成
+PROFILE_IGNORE_PATTERNS = ('Singleton*', 'lockfile', 'LOCK', 'Cache', 'Code Cache', 'GPUCache',
+                           'CacheStorage', 'ScriptCache', 'ShaderCache', 'GrShaderCache', 'Crashpad')
+
+
+def clone_profile(source_dir: str, target_dir: str):
+    """
+    克隆浏览器配置文件（包括登录状态），已存在的旧克隆会被替换
+
+    Args:
+        source_dir: 已登录的浏览器配置文件目录
+        target_dir: 克隆目标目录
+    """
+    if os.path.exists(target_dir):
+        shutil.rmtree(target_dir)
+    shutil.copytree(source_dir, target_dir, symlinks=True,
+                    ignore=shutil.ignore_patterns(*PROFILE_IGNORE_PATTERNS))
+
+
+def assign_shard(user: str, shard_count: int) -> int:
+    """
+    使用 rendezvous hashing 为用户选择工作进程：
+    对每个分片计算 hash(用户名, 分片编号)，取值最大的分片
+
+    Returns:
+        int: 分片编号（0 到 shard_count - 1）
+    """
+    def weight(shard_index: int) -> int:
+        digest = hashlib.md5(f"{user.lower()}:{shard_index}".encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    return max(range(shard_count), key=weight)
+
+
+def split_users(users: List[str], shard_count: int) -> List[List[str]]:
+    """按一致性哈希把用户列表分成 shard_count 份，保持每份内的原有顺序"""
+    shards = [[] for _ in range(shard_count)]
+    for user in users:
+        shards[assign_shard(user, shard_count)].append(user)
+    return shards
+
+
+def _worker_main(shard_index: int, user_data_dir: str, task_queue, result_queue):
+    """
+    工作进程入口：等待协调进程下发一轮的任务，抓取后逐个返回结果
+
+    任务格式: (轮次编号, 用户列表, since_ids, 时间预算秒数或 None)，收到 None 时退出
+    返回格式: ('result', 轮次编号, 用户名, 推文列表)，本轮结束时发送 ('done', 轮次编号, None, None)
+    """
+    worker_log = logger.get_logger(f'shard-{shard_index}')
+    browser = browser_manager.BrowserManager(user_data_dir=user_data_dir)
+    worker_log.info(f"工作进程 {shard_index} 已启动，配置文件: {user_data_dir}")
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            round_id, users, since_ids, budget_seconds = task
+            # 时间预算换算成本进程的截止时间，到期后不再开始抓取新的用户
+            deadline = time.monotonic() + budget_seconds if budget_seconds is not None else None
+            try:
+                for user, tweets in main.scrape_users(browser, users, since_ids, deadline):
+                    result_queue.put(('result', round_id, user, tweets))
+            except Exception as e:
+                worker_log.error(f"工作进程 {shard_index} 抓取时发生错误: {e}", exc_info=True)
+            finally:
+                # 主页变化预检的记录只保存在工作进程内存中：已见推文由协调进程保存，工作进程无法确认它们已经保存
+                scraper.log_probe_summary()
+                browser.end_round()
+                if not config.KEEP_BROWSER_ALIVE:
+                    browser.stop()
+                result_queue.put(('done', round_id, None, None))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        browser.stop()
+        worker_log.info(f"工作进程 {shard_index} 已退出")
+
+
+class _Worker:
+    """协调进程中记录的一个工作进程"""
+
+    def __init__(self, index: int, user_data_dir: str):
+        self.index = index
+        self.user_data_dir = user_data_dir
+        self.process = None
+        self.task_queue = None
+        # 每个工作进程使用自己的结果队列：强制结束的进程可能正在写入队列，
+        # 重启时连同队列一起替换，不会影响其他工作进程的结果
+        self.result_queue = None
+
+
+class ShardedRunner:
+    """
+    多进程分片监控
+
+    用法:
+        runner = ShardedRunner(shard_count=4)
+        runner.start()
+        runner.run_round(users, deadline)  # 每轮调用
+        runner.stop()
+    """
+
+    def __init__(self, shard_count: Optional[int] = None, profile_dir: Optional[str] = None):
+        """
+        Args:
+            shard_count: 工作进程数量，默认使用 config.SHARD_COUNT
+            profile_dir: 克隆配置文件的存放目录，默认使用 config.SHARD_PROFILE_DIR
+        """
+        self.shard_count = shard_count or config.SHARD_COUNT
+        self.profile_dir = profile_dir or config.SHARD_PROFILE_DIR
+        # 使用 spawn 启动子进程，避免 fork 继承父进程的线程和文件句柄
+        self.mp_context = multiprocessing.get_context('spawn')
+        self.round_id = 0
+        self.workers = [_Worker(index, os.path.join(self.profile_dir, f"shard_{index}"))
+                        for index in range(self.shard_count)]
+
+    def start(self):
+        """克隆配置文件并启动所有工作进程"""
+        log.info(f"克隆浏览器配置文件 '{browser_config.USER_DATA_DIR}' 到 {self.shard_count} 个工作目录")
+        for worker in self.workers:
+            clone_profile(browser_config.USER_DATA_DIR, worker.user_data_dir)
+        for worker in self.workers:
+            self._start_worker(worker)
+
+    def _start_worker(self, worker: _Worker):
+        worker.task_queue = self.mp_context.Queue()
+        worker.result_queue = self.mp_context.Queue()
+        worker.process = self.mp_context.Process(
+            target=_worker_main,
+            args=(worker.index, worker.user_data_dir, worker.task_queue, worker.result_queue),
+            name=f"x-monitor-shard-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    def _restart_worker(self, worker: _Worker, reason: str):
+        log.warning(f"重启工作进程 {worker.index}: {reason}")
+        self._terminate_worker(worker)
+        self._start_worker(worker)
+
+    def _terminate_worker(self, worker: _Worker):
+        if worker.process and worker.process.is_alive():
+            worker.process.terminate()
+        if worker.process:
+            worker.process.join(timeout=10)
+
+    def stop(self):
+        """通知所有工作进程退出，超时未退出的强制结束"""
+        for worker in self.workers:
+            if worker.process and worker.process.is_alive():
+                worker.task_queue.put(None)
+        for worker in self.workers:
+            if worker.process:
+                worker.process.join(timeout=30)
+                self._terminate_worker(worker)
+
+    def run_round(self, users: Optional[List[str]] = None,
+                  deadline: Optional[float] = None) -> Tuple[int, List[str]]:
+        """
+        执行一轮监控检查：下发任务，汇总结果，统一发送通知并保存状态
+
+        Args:
+            users: 本轮要检查的用户，默认检查所有监控来源
+            deadline: 本轮的截止时间（time.monotonic() 时间），工作进程到期后不再开始抓取新的用户
+
+        Returns:
+            tuple: (新推文数量, 本轮未检查的用户列表)
+        """
+        logger.log_round_start()
+        seen_store = database.open_seen_store()
+        seen_marks = database.open_seen_marks()
+        all_new_tweets = []
+        checked_users = set()
+
+        if users is None:
+            users = main.get_monitor_sources()
+        since_ids = seen_marks.get_since_ids(users) if config.STOP_AT_LAST_SEEN else {}
+
+        # 下发任务，结果按轮次编号区分，忽略之前轮次遗留的结果
+        self.round_id += 1
+        budget_seconds = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        pending = {}
+        for worker, shard_users in zip(self.workers, split_users(users, self.shard_count)):
+            if not shard_users:
+                continue
+            if not worker.process.is_alive():
+                self._restart_worker(worker, "进程已退出")
+            worker.task_queue.put((self.round_id, shard_users, {user: since_ids.get(user) for user in shard_users},
+                                   budget_seconds))
+            # 每个用户最多 USER_SCRAPE_TIMEOUT_SECONDS 秒，超过则认为工作进程卡住
+            pending[worker.index] = time.monotonic() + config.USER_SCRAPE_TIMEOUT_SECONDS * len(shard_users)
+            log.info(f"工作进程 {worker.index}: 分配 {len(shard_users)} 个用户")
+
+        # 汇总结果，直到所有工作进程完成本轮
+        while pending:
+            received = False
+            for index in list(pending):
+                worker = self.workers[index]
+                try:
+                    kind, round_id, user, tweets = worker.result_queue.get_nowait()
+                except queue.Empty:
+                    if not worker.process.is_alive():
+                        pending.pop(index)
+                        self._restart_worker(worker, "进程意外退出")
+                    elif time.monotonic() > pending[index]:
+                        pending.pop(index)
+                        self._restart_worker(worker, "本轮抓取超时")
+                    continue
+
+                received = True
+                if round_id != self.round_id:
+                    log.debug(f"工作进程 {index}: 忽略第 {round_id} 轮遗留的结果")
+                elif kind == 'done':
+                    pending.pop(index)
+                else:
+                    checked_users.add(user)
+                    all_new_tweets.extend(processing.check_user_tweets(user, tweets, seen_store, seen_marks))
+
+            if not received:
+                time.sleep(0.1)
+
+        if all_new_tweets:
+            processing.notify_new_tweets(all_new_tweets)
+
+        processing.save_round_state(seen_store, seen_marks, len(all_new_tweets))
+
+        unchecked_users = [user for user in users if user not in checked_users]
+        if unchecked_users:
+            log.warning(f"本轮时间预算已用完，{len(unchecked_users)} 个用户顺延到下一轮")
+        return len(all_new_tweets), unchecked_users
+
+    def run(self):
+        """在固定的时间点循环检查所有用户，上一轮未检查的用户在下一轮优先检查（与单进程相同）"""
+        self.start()
+        users = main.get_monitor_sources()
+        clock = scheduler.RoundClock(config.MONITOR_INTERVAL_SECONDS)
+        rolled_over = []
+        try:
+            while True:
+                deadline = clock.wait_for_next_tick()
+                round_users = rolled_over + [user for user in users if user not in rolled_over]
+                new_tweets_count, rolled_over = self.run_round(round_users, deadline)
+                clock.end_round(len(rolled_over))
+                logger.log_round_end(new_tweets_count, int(clock.seconds_until_next_tick()))
+        finally:
+            self.stop()
+
+
+def run():
+    """启动多进程分片监控（阻塞直到被中断）"""
+    if not os.path.exists(browser_config.USER_DATA_DIR):
+        log.error(f"浏览器配置文件目录 '{browser_config.USER_DATA_DIR}' 未找到")
+        log.error("请先运行 'python initialize_profile.py' 来完成首次登录和初始化")
+        return
+    if config.ADAPTIVE_SCHEDULING:
+        log.warning("多进程分片不支持自适应调度（ADAPTIVE_SCHEDULING），将按固定间隔检查所有用户")
+    ShardedRunner().run()
@@ -0,0 +1,46 @@
+"""
+推文ID（Snowflake）解析模块
+2010 年 11 月之后的推文ID是 Snowflake ID，高位是从 Twitter 纪元开始的毫秒数:
+    发布时间（毫秒） = (推文ID >> 22) + 1288834974657
+直接从推文ID计算发布时间，不需要读取页面上的时间元素，结果也与推文的排序方式一致。
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Twitter 纪元: 2010-11-04 01:42:54.657 UTC（毫秒时间戳）
+TWITTER_EPOCH_MS = 1288834974657
+
+# 时间戳之后的位数（机器编号和序列号）
+TIMESTAMP_SHIFT = 22
+
+# 第一个 Snowflake 推文ID，更早的推文ID是顺序编号，不包含时间
+FIRST_SNOWFLAKE_ID = 29700859247
+
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def is_snowflake(tweet_id) -> bool:
+    return int(tweet_id) >= FIRST_SNOWFLAKE_ID
+
+
+def snowflake_to_datetime(tweet_id) -> Optional[datetime]:
+    """
+    从推文ID计算发布时间
+
+    Returns:
+        datetime: 时区无关的 UTC 时间（与 parse_iso_datetime 的结果一致）；不是 Snowflake ID 时返回 None
+    """
+    tweet_id = int(tweet_id)
+    if tweet_id < FIRST_SNOWFLAKE_ID:
+        return None
+    timestamp_ms = (tweet_id >> TIMESTAMP_SHIFT) + TWITTER_EPOCH_MS
+    return _UNIX_EPOCH + timedelta(milliseconds=timestamp_ms)
+
+
+def datetime_to_snowflake(dt: datetime) -> int:
+    """
+    计算指定时间（时区无关的 UTC 时间）对应的最小推文ID：
+    ID 不小于它的推文都不早于该时间，ID 小于它的推文都早于该时间
+    """
+    timestamp_ms = int((dt - _UNIX_EPOCH) / timedelta(milliseconds=1))
+    return max(0, timestamp_ms - TWITTER_EPOCH_MS) << TIMESTAMP_SHIFT
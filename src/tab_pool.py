@@ -0,0 +1,216 @@
+"""
+多标签页并发抓取模块
+在同一个持久化浏览器上下文中打开多个标签页，每个标签页从队列中领取用户进行抓取。
+
+Playwright 同步接口只能在一个线程中调用，因此这里的并发是交错执行：
+先在所有空闲标签页上发起导航，由浏览器并行加载页面；
+再轮询各标签页，哪个先就绪就先提取哪个，提取完成后立即为它领取下一个用户。
+页面加载（网络和渲染）是主要耗时，这部分在多个标签页之间是并行的。
+
+预加载模式（in_order=True）按用户顺序逐个提取，其余标签页提前加载后面的用户；
+某个用户的结果交给调用方处理时，后面用户的页面已经在加载。
+"""
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import config, logger, browser_config, scraper
+from .models import Tweet
+
+# 获取日志器
+log = logger.get_logger('tab_pool')
+
+
+class _TabSlot:
+    """一个标签页及其正在进行的抓取"""
+
+    def __init__(self, index: int, page):
+        self.index = index
+        self.page = page
+        self.scrape = None
+        self.started_at = 0.0
+
+    @property
+    def is_idle(self) -> bool:
+        return self.scrape is None
+
+
+class TabPool:
+    """
+    标签页工作池
+
+    用法:
+        pool = TabPool(context, size=3, first_page=page)
+        for user, tweets in pool.scrape_users(users, since_ids):
+            ...
+        pool.close()
+    """
+
+    def __init__(self, context, size: int, first_page=None,
+                 ready_timeout_seconds: Optional[int] = None):
+        """
+        Args:
+            context: 浏览器上下文
+            size: 标签页数量（并发上限）
+            first_page: 可复用的已有页面，作为第一个标签页
+            ready_timeout_seconds: 单个标签页等待推文出现的最长时间，超时视为失败
+        """
+        self.context = context
+        self.ready_timeout_seconds = (config.TAB_READY_TIMEOUT_SECONDS
+                                      if ready_timeout_seconds is None else ready_timeout_seconds)
+        self._own_pages = []
+        self.slots = []
+        for index in range(size):
+            if index == 0 and first_page is not None:
+                page = first_page
+            else:
+                page = browser_config.create_configured_page(context)
+                self._own_pages.append(page)
+            self.slots.append(_TabSlot(index, page))
+
+    def close(self):
+        """关闭工作池自己创建的标签页（不关闭传入的 first_page）"""
+        for slot in self.slots:
+            if slot.scrape:
+                slot.scrape.close()
+        for page in self._own_pages:
+            try:
+                page.close()
+            except Exception as e:
+                log.debug(f"关闭标签页时出错: {e}")
+        self._own_pages = []
+
+    def _recycle_page(self, slot: _TabSlot):
+        """超时或出错的标签页可能处于异常状态，换一个新的标签页继续工作"""
+        old_page = slot.page
+        slot.page = browser_config.create_configured_page(self.context)
+        self._own_pages.append(slot.page)
+        try:
+            old_page.close()
+        except Exception as e:
+            log.debug(f"关闭异常标签页时出错: {e}")
+        if old_page in self._own_pages:
+            self._own_pages.remove(old_page)
+
+    def _start(self, slot: _TabSlot, user: str, since_id: Optional[str],
+               deadline: Optional[float] = None) -> bool:
+        """在标签页上为用户发起导航，不等待页面加载完成"""
+        logger.log_scraping_start(user, config.DAYS_TO_SCRAPE, config.MAX_TWEETS_PER_USER)
+        scrape = scraper.TimelineScrape(slot.page, user, since_id, deadline)
+        if not scrape.navigate(wait_until="commit"):
+            return False
+        slot.scrape = scrape
+        slot.started_at = time.monotonic()
+        log.debug(f"标签页 {slot.index}: 开始加载用户 {user}")
+        return True
+
+    def _poll_ready(self, slot: _TabSlot) -> Optional[str]:
+        """
+        检查标签页状态
+
+        Returns:
+            "ready" 表示已就绪；"unavailable" 表示页面正常但无法抓取（如账号不存在、需要登录）；
+            "failed" 表示超时或页面异常；None 表示仍在加载
+        """
+        try:
+            state = slot.scrape.get_page_state()
+        except Exception as e:
+            log.warning(f"标签页 {slot.index}: 用户 {slot.scrape.username} 页面异常: {e}")
+            return "failed"
+        if state:
+            scraper.record_navigation('full', time.monotonic() - slot.started_at, slot.scrape.username)
+            return "ready" if slot.scrape.handle_page_state(state) else "unavailable"
+        if time.monotonic() - slot.started_at > self.ready_timeout_seconds:
+            log.warning(f"标签页 {slot.index}: 用户 {slot.scrape.username} 等待 {self.ready_timeout_seconds} 秒仍未加载出推文")
+            return "failed"
+        return None
+
+    def _user_deadline(self, deadline: Optional[float], remaining_users: int) -> Optional[float]:
+        """把本轮剩余的时间预算按标签页数量分给尚未完成的用户"""
+        if deadline is None:
+            return None
+        now = time.monotonic()
+        share = (deadline - now) * len(self.slots) / max(remaining_users, len(self.slots))
+        return min(deadline, now + max(share, 0))
+
+    def _fill(self, queue: deque, since_ids: Dict[str, str], deadline: Optional[float]) -> List[str]:
+        """为空闲标签页领取用户并发起导航，返回无法发起导航的用户"""
+        if queue and deadline is not None and time.monotonic() >= deadline:
+            log.warning(f"本轮时间预算已用完，{len(queue)} 个用户顺延到下一轮")
+            queue.clear()
+
+        failed_users = []
+        for slot in self.slots:
+            while slot.is_idle and queue:
+                user = queue.popleft()
+                if not self._start(slot, user, since_ids.get(user), self._user_deadline(deadline, len(queue) + 1)):
+                    failed_users.append(user)
+        return failed_users
+
+    def _finish(self, slot: _TabSlot, state: str) -> Tuple[str, List[Tweet]]:
+        """提取已就绪标签页上的推文；失败的标签页换成新的标签页。完成后标签页变为空闲"""
+        scrape = slot.scrape
+        slot.scrape = None
+        if state == "ready":
+            try:
+                slot.page.bring_to_front()
+                return scrape.username, scrape.collect()
+            except Exception as e:
+                log.error(f"标签页 {slot.index}: 抓取用户 {scrape.username} 时发生错误: {e}")
+        elif state == "unavailable":
+            return scrape.username, []
+        scrape.close()
+        self._recycle_page(slot)
+        return scrape.username, []
+
+    def scrape_users(self, users: List[str], since_ids: Dict[str, str], deadline: Optional[float] = None,
+                     in_order: bool = False) -> Iterator[Tuple[str, List[Tweet]]]:
+        """
+        并发抓取多个用户
+
+        Args:
+            users: 用户名列表
+            since_ids: 每个用户上次已见的最新推文ID
+            deadline: 本轮的截止时间（time.monotonic() 时间），到期后不再领取新用户，
+                      剩余时间按尚未完成的用户平均分配
+            in_order: 按用户顺序逐个提取，其余标签页提前加载后面的用户（预加载模式）；
+                      为 False 时哪个标签页先就绪就先提取哪个
+
+        Yields:
+            (用户名, 推文列表)；失败的用户返回空列表，到期未开始的用户不返回
+        """
+        queue = deque(users)
+        if in_order:
+            log.info(f"按顺序抓取 {len(queue)} 个用户，提前加载后面 {len(self.slots) - 1} 个用户")
+        else:
+            log.info(f"使用 {len(self.slots)} 个标签页并发抓取 {len(queue)} 个用户")
+
+        for user in self._fill(queue, since_ids, deadline):
+            yield user, []
+
+        while any(not slot.is_idle for slot in self.slots):
+            # 按发起导航的先后顺序检查，先就绪的先提取；预加载模式下只检查最早发起的一个
+            busy_slots = sorted((slot for slot in self.slots if not slot.is_idle), key=lambda s: s.started_at)
+            if in_order:
+                busy_slots = busy_slots[:1]
+
+            finished = None
+            for slot in busy_slots:
+                state = self._poll_ready(slot)
+                if state is not None:
+                    finished = (slot, state)
+                    break
+
+            if finished is None:
+                # 所有标签页都在加载，短暂等待（期间 Playwright 会继续分发事件）
+                try:
+                    busy_slots[0].page.wait_for_timeout(100)
+                except Exception:
+                    time.sleep(0.1)
+                continue
+
+            result = self._finish(*finished)
+            # 先为空出的标签页开始加载下一个用户，再把结果交给调用方处理，使页面加载与结果处理同时进行
+            failed_users = self._fill(queue, since_ids, deadline)
+            yield result
+            for user in failed_users:
+                yield user, []
@@ -0,0 +1,208 @@
+"""
+时间线数据解析模块
+解析 X 网页端时间线 GraphQL 接口（UserTweets 等）返回的 JSON 数据，
+直接从接口数据中提取推文，不依赖页面 DOM 结构
+"""
+import html
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+# 返回用户时间线数据的 GraphQL 操作名
+TIMELINE_OPERATIONS = ('UserTweets', 'UserTweetsAndReplies')
+
+# 返回搜索结果的 GraphQL 操作名
+SEARCH_OPERATIONS = ('SearchTimeline',)
+
+# 返回列表时间线的 GraphQL 操作名
+LIST_OPERATIONS = ('ListLatestTweetsTimeline',)
+
+# 返回用户资料的 GraphQL 操作名（打开用户主页时在时间线之前请求）
+PROFILE_OPERATIONS = ('UserByScreenName',)
+
+# GraphQL 接口地址格式: https://x.com/i/api/graphql/<queryId>/<OperationName>?variables=...
+_GRAPHQL_URL_PATTERN = re.compile(r'/i/api/graphql/[^/]+/(\w+)')
+
+# 推文 created_at 字段格式，例如: "Wed Oct 10 20:19:24 +0000 2018"
+_CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+
+def get_operation_name(url: str) -> Optional[str]:
+    """从 GraphQL 接口地址中提取操作名，非 GraphQL 地址返回 None"""
+    match = _GRAPHQL_URL_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def is_timeline_response(url: str, operations=TIMELINE_OPERATIONS) -> bool:
+    """判断响应地址是否为时间线接口（默认为用户时间线）"""
+    return get_operation_name(url) in operations
+
+
+def parse_created_at(created_at: str) -> datetime:
+    """解析推文 created_at 字段，返回时区无关的 UTC 时间（与 DOM 中 datetime 属性的处理方式一致）"""
+    dt = datetime.strptime(created_at, _CREATED_AT_FORMAT)
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _iter_instructions(node) -> Iterator[Dict]:
+    """递归查找响应中所有的时间线指令（instructions），兼容 timeline / timeline_v2 等不同嵌套层级"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'instructions' and isinstance(value, list):
+                for instruction in value:
+                    if isinstance(instruction, dict):
+                        yield instruction
+            else:
+                yield from _iter_instructions(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_instructions(item)
+
+
+def _iter_entries(instructions: Iterator[Dict]) -> Iterator[tuple]:
+    """遍历时间线条目，返回 (entry, is_pinned)"""
+    for instruction in instructions:
+        instruction_type = instruction.get('type')
+        if instruction_type == 'TimelineAddEntries':
+            for entry in instruction.get('entries', []):
+                yield entry, False
+        elif instruction_type == 'TimelinePinEntry' and instruction.get('entry'):
+            yield instruction['entry'], True
+        elif instruction_type == 'TimelineReplaceEntry' and instruction.get('entry'):
+            yield instruction['entry'], False
+
+
+def _iter_item_contents(entry: Dict) -> Iterator[Dict]:
+    """从单个条目中取出推文内容，兼容单条推文和会话模块（多条推文）两种形式"""
+    if entry.get('entryId', '').startswith('promoted'):
+        return
+
+    content = entry.get('content', {})
+    if 'itemContent' in content:
+        yield content['itemContent']
+    for module_item in content.get('items', []):
+        item_content = module_item.get('item', {}).get('itemContent')
+        if item_content:
+            yield item_content
+
+
+def _unwrap_tweet_result(result: Optional[Dict]) -> Optional[Dict]:
+    """去掉 TweetWithVisibilityResults 等包装层，返回真正的推文对象"""
+    if not result:
+        return None
+    if result.get('__typename') == 'TweetWithVisibilityResults':
+        result = result.get('tweet')
+    if not result or 'legacy' not in result or 'rest_id' not in result:
+        return None
+    return result
+
+
+def _get_screen_name(tweet_result: Dict) -> str:
+    """获取推文作者的用户名"""
+    user_result = tweet_result.get('core', {}).get('user_results', {}).get('result', {})
+    # 新版接口把 screen_name 移到了 core 下，旧版在 legacy 下
+    return (user_result.get('core', {}).get('screen_name')
+            or user_result.get('legacy', {}).get('screen_name', ''))
+
+
+def _extract_media(legacy: Dict) -> List[Dict]:
+    """提取推文中的图片和视频地址"""
+    media_items = (legacy.get('extended_entities') or legacy.get('entities') or {}).get('media', [])
+    media = []
+    for item in media_items:
+        media_type = item.get('type', 'photo')
+        media_url = item.get('media_url_https', '')
+        if media_type in ('video', 'animated_gif'):
+            # 视频取码率最高的 mp4 版本
+            variants = [v for v in item.get('video_info', {}).get('variants', [])
+                        if v.get('content_type') == 'video/mp4']
+            if variants:
+                media_url = max(variants, key=lambda v: v.get('bitrate', 0))['url']
+        media.append({'type': media_type, 'url': media_url})
+    return media
+
+
+def _extract_text(tweet_result: Dict) -> str:
+    """提取推文全文（长推文优先使用 note_tweet 中的完整内容）"""
+    note_text = (tweet_result.get('note_tweet', {})
+                 .get('note_tweet_results', {})
+                 .get('result', {})
+                 .get('text'))
+    legacy = tweet_result['legacy']
+    text = note_text or legacy.get('full_text', '')
+
+    # full_text 末尾会附带媒体的 t.co 短链接，页面上并不显示
+    for item in legacy.get('entities', {}).get('media', []):
+        text = text.replace(item.get('url', ''), '')
+    return html.unescape(text).strip()
+
+
+def parse_tweet_result(tweet_result: Dict, is_pinned: bool = False) -> Optional[Dict]:
+    """
+    将单个推文对象解析为推文字典
+
+    转推与页面上的显示保持一致：使用被转推的原推文的 ID、内容和时间，
+    并通过 is_retweet 标记
+
+    Returns:
+        dict: 包含 id, author, text, url, created_at, media, is_pinned, is_retweet, is_reply，解析失败时返回 None
+    """
+    tweet_result = _unwrap_tweet_result(tweet_result)
+    if not tweet_result:
+        return None
+
+    is_retweet = False
+    retweeted = _unwrap_tweet_result(
+        tweet_result['legacy'].get('retweeted_status_result', {}).get('result'))
+    if retweeted:
+        tweet_result = retweeted
+        is_retweet = True
+
+    legacy = tweet_result['legacy']
+    tweet_id = tweet_result['rest_id']
+    author = _get_screen_name(tweet_result)
+
+    return {
+        'id': tweet_id,
+        'author': author,
+        'text': _extract_text(tweet_result),
+        'url': f"https://x.com/{author}/status/{tweet_id}",
+        'created_at': parse_created_at(legacy['created_at']),
+        'media': _extract_media(legacy),
+        'is_pinned': is_pinned,
+        'is_retweet': is_retweet,
+        'is_reply': bool(legacy.get('in_reply_to_status_id_str')),
+    }
+
+
+def parse_profile_post_count(payload: Dict) -> Optional[int]:
+    """
+    解析用户资料接口的响应数据，返回用户的发帖总数（statuses_count，包括回复和转推）
+
+    Returns:
+        int: 发帖总数；账号不可用或响应格式无法识别时返回 None
+    """
+    result = ((payload.get('data') or {}).get('user') or {}).get('result') or {}
+    count = (result.get('legacy') or {}).get('statuses_count')
+    return int(count) if count is not None else None
+
+
+def parse_timeline_response(payload: Dict) -> List[Dict]:
+    """
+    解析时间线接口的响应数据
+
+    Args:
+        payload: 接口返回的 JSON 对象
+
+    Returns:
+        list: 推文字典列表，顺序与时间线一致
+    """
+    tweets = []
+    for entry, is_pinned in _iter_entries(_iter_instructions(payload)):
+        for item_content in _iter_item_contents(entry):
+            if item_content.get('itemType') != 'TimelineTweet' or item_content.get('promotedMetadata'):
+                continue
+            tweet = parse_tweet_result(item_content.get('tweet_results', {}).get('result'), is_pinned)
+            if tweet:
+                tweets.append(tweet)
+    return tweets
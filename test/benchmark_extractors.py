@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+推文提取方式性能对比
+在保存的时间线 HTML 样例上，对比逐元素定位器提取（dom）和一次 evaluate 批量提取（batch）的耗时，
+并检查流式提取（stream）推送的推文与批量提取一致
+"""
+import sys
+import os
+import time
+import statistics
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import sync_playwright
+from src import config, scraper
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'timeline.html')
+TWEET_SELECTOR = "article[data-testid='tweet']"
+ITERATIONS = 20
+
+
+def run_extractor(page, collect_func):
+    """运行一次完整提取，返回 (耗时毫秒, 推文ID列表)"""
+    collector = scraper.TweetCollector('benchmark')
+    start = time.perf_counter()
+    collect_func(page, TWEET_SELECTOR, collector)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return elapsed_ms, [tweet.id for tweet in collector.tweets]
+
+
+def benchmark():
+    """对比两种提取方式"""
+    # 样例中的推文时间是固定的，放宽日期范围避免被过滤
+    config.DAYS_TO_SCRAPE = 36500
+    config.MAX_TWEETS_PER_USER = 1000
+
+    with open(FIXTURE_PATH, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    extractors = {
+        'dom (逐元素定位器)': scraper._collect_from_dom,
+        'batch (一次 evaluate)': scraper._collect_from_batch,
+    }
+
+    print("=" * 60)
+    print("推文提取方式性能对比")
+    print("=" * 60)
+    print(f"样例文件: {FIXTURE_PATH}")
+    print(f"每种方式运行 {ITERATIONS} 次")
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(html)
+        print(f"样例中的推文元素: {page.locator(TWEET_SELECTOR).count()} 个")
+
+        results = {}
+        for name, collect_func in extractors.items():
+            # 预热一次，排除首次调用的额外开销
+            run_extractor(page, collect_func)
+            timings = []
+            tweet_ids = []
+            for _ in range(ITERATIONS):
+                elapsed_ms, tweet_ids = run_extractor(page, collect_func)
+                timings.append(elapsed_ms)
+            results[name] = (timings, tweet_ids)
+
+        # 流式提取由页面推送，没有单独的提取耗时，只检查结果
+        stream = scraper.get_tweet_stream(page)
+        page.evaluate(scraper.STREAM_OBSERVER_SCRIPT, scraper.get_stream_observer_args())
+        page.wait_for_timeout(200)
+        stream_collector = scraper.TweetCollector('benchmark')
+        scraper._collect_from_stream(stream, stream_collector)
+        stream_ids = [tweet.id for tweet in stream_collector.tweets]
+
+        browser.close()
+
+    print("\n结果:")
+    for name, (timings, tweet_ids) in results.items():
+        print(f"  {name}:")
+        print(f"    提取推文: {len(tweet_ids)} 条")
+        print(f"    平均耗时: {statistics.mean(timings):.2f} 毫秒")
+        print(f"    中位耗时: {statistics.median(timings):.2f} 毫秒")
+        print(f"    最短耗时: {min(timings):.2f} 毫秒")
+
+    (dom_timings, dom_ids), (batch_timings, batch_ids) = results.values()
+    print(f"\n加速比: {statistics.median(dom_timings) / statistics.median(batch_timings):.1f}x")
+    print(f"提取结果一致: {'✅ 是' if dom_ids == batch_ids else '❌ 否'}")
+    print(f"流式提取结果一致: {'✅ 是' if stream_ids == batch_ids else '❌ 否'} (推送 {len(stream_ids)} 条)")
+
+
+if __name__ == "__main__":
+    benchmark()
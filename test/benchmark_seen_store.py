@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+已见推文存储性能对比
+在临时目录中生成指定数量的推文ID，对比 JSON 文件（整个读入集合）和二进制文件（内存映射后二分查找）
+的文件大小、打开耗时、内存占用和查询耗时
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from src import database, snowflake
+
+LOOKUPS = 100000
+
+
+def generate_tweet_ids(count: int):
+    """生成最近三年内随机分布的推文ID（字符串形式，与数据库中的格式一致）"""
+    start = snowflake.datetime_to_snowflake(datetime.utcnow() - timedelta(days=3 * 365))
+    end = snowflake.datetime_to_snowflake(datetime.utcnow())
+    return {str(random.randrange(start, end)) for _ in range(count)}
+
+
+def measure(name: str, open_store, hits, misses):
+    """打开存储并查询，返回一行结果"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = open_store()
+    open_ms = (time.perf_counter() - start) * 1000
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    found = sum(tweet_id in store for tweet_id in hits)
+    found_misses = sum(tweet_id in store for tweet_id in misses)
+    lookup_us = (time.perf_counter() - start) * 1e6 / (len(hits) + len(misses))
+    store.close()
+
+    ok = found == len(hits) and found_misses == 0
+    return f"{name:<8} {open_ms:>10.1f} {memory_mb:>10.1f} {lookup_us:>10.2f}   {'一致' if ok else '不一致'}"
+
+
+def benchmark(count: int):
+    print(f"生成 {count} 条推文ID...")
+    tweet_ids = generate_tweet_ids(count)
+    hits = random.sample(sorted(tweet_ids), min(LOOKUPS, len(tweet_ids)))
+    misses = [str(int(tweet_id) + 1) for tweet_id in hits if str(int(tweet_id) + 1) not in tweet_ids]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_path = os.path.join(temp_dir, 'seen_tweets.json')
+        bin_path = os.path.join(temp_dir, 'seen_tweets.bin')
+        database.save_seen_tweet_ids(json_path, tweet_ids)
+
+        start = time.perf_counter()
+        database.BinarySeenStore(bin_path, json_path=json_path).close()
+        print(f"从 JSON 导入二进制文件耗时: {(time.perf_counter() - start) * 1000:.1f} 毫秒")
+
+        print(f"\n{'存储':<8} {'文件(MB)':>10}")
+        for name, path in (('json', json_path), ('binary', bin_path)):
+            print(f"{name:<8} {os.path.getsize(path) / 1024 / 1024:>10.1f}")
+
+        print(f"\n{'存储':<8} {'打开(毫秒)':>10} {'内存(MB)':>10} {'查询(微秒)':>10}   结果")
+        print(measure('json', lambda: database.JsonSeenStore(json_path), hits, misses))
+        print(measure('binary', lambda: database.BinarySeenStore(bin_path), hits, misses))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="已见推文存储性能对比")
+    parser.add_argument('--count', type=int, default=1000000, help='推文ID数量（默认 1000000）')
+    benchmark(parser.parse_args().count)
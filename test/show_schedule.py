@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+自适应调度查看工具
+读取调度状态文件，显示每个用户的发推频率估计、检查间隔和下一次检查时间
+"""
+import sys
+import os
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config, scheduler
+
+
+def show_schedule():
+    """按下一次检查时间从早到晚显示所有用户"""
+    users = [user.strip() for user in config.TARGET_USERS if user.strip()]
+    user_scheduler = scheduler.UserScheduler(users)
+    now = time.time()
+
+    print("=" * 60)
+    print("自适应调度状态")
+    print("=" * 60)
+    print(f"状态文件: {config.SCHEDULE_STATE_FILE_PATH}")
+    print(f"检查间隔范围: {config.SCHEDULE_MIN_INTERVAL_SECONDS} ~ {config.SCHEDULE_MAX_INTERVAL_SECONDS} 秒")
+    print()
+
+    next_due_times = user_scheduler.get_next_due_times()
+    for user in sorted(users, key=lambda u: next_due_times[u]):
+        rate = user_scheduler.estimate_rate(user, now)
+        due = next_due_times[user]
+        remaining = (due - datetime.now()).total_seconds()
+        print(f"👤 {user}")
+        print(f"   推文记录: {len(user_scheduler.timestamps.get(user, []))} 条")
+        print(f"   发推频率: {f'{rate:.2f} 条/小时' if rate is not None else '无推文'}")
+        print(f"   基础间隔: {user_scheduler.compute_interval(user, now):.0f} 秒")
+        if remaining > 0:
+            print(f"   下次检查: {due.strftime('%Y-%m-%d %H:%M:%S')} ({remaining:.0f} 秒后)")
+        else:
+            print("   下次检查: 已到期")
+
+
+if __name__ == "__main__":
+    show_schedule()
@@ -67,11 +67,11 @@ def test_scraper():
             if tweets:
                 for i, tweet in enumerate(tweets):
                     print(f"\n{i+1}. 推文详情:")
-                    print(f"   ID: {tweet['id']}")
-                    print(f"   时间: {tweet['timestamp']}")
-                    print(f"   用户: {tweet['user']}")
-                    print(f"   内容: {tweet['text'][:150]}{'...' if len(tweet['text']) > 150 else ''}")
-                    print(f"   URL: {tweet['url']}")
+                    print(f"   ID: {tweet.id}")
+                    print(f"   时间: {tweet.timestamp}")
+                    print(f"   用户: {tweet.user}")
+                    print(f"   内容: {tweet.text[:150]}{'...' if len(tweet.text) > 150 else ''}")
+                    print(f"   URL: {tweet.url}")
             else:
                 print("未找到任何推文")
             
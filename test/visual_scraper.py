@@ -100,9 +100,9 @@ def visual_scraping_test():
             if tweets:
                 print(f"\n推文摘要:")
                 for i, tweet in enumerate(tweets[:5]):  # 只显示前5条
-                    print(f"{i+1}. ID: {tweet['id']}")
-                    print(f"   时间: {tweet['timestamp']}")
-                    print(f"   内容: {tweet['text'][:100]}{'...' if len(tweet['text']) > 100 else ''}")
+                    print(f"{i+1}. ID: {tweet.id}")
+                    print(f"   时间: {tweet.timestamp}")
+                    print(f"   内容: {tweet.text[:100]}{'...' if len(tweet.text) > 100 else ''}")
                     print()
                 
                 if len(tweets) > 5: